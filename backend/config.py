@@ -0,0 +1,20 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables once, before any handler reads them
+load_dotenv()
+
+# API keys, read once at import instead of on every handler instantiation
+ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+
+# The prompt optimizer uses Anthropic when available and falls back to Groq
+OPTIMIZER_API_TYPE = "anthropic" if ANTHROPIC_API_KEY else "groq"
+OPTIMIZER_API_KEY = ANTHROPIC_API_KEY or GROQ_API_KEY
+
+# Location of the persistent LLM response cache; ":memory:" keeps it in-process only
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH")
+
+# Provider endpoints
+ANTHROPIC_API_URL = "https://api.anthropic.com/v1/complete"
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
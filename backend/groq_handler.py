@@ -4,12 +4,125 @@ from typing import Dict, Any
 import requests
 import json
 
+from .config import GROQ_API_KEY, GROQ_API_URL
+from .http_client import API_TIMEOUT, create_api_session
+from .response_cache import ResponseCache, get_response_cache
+
+# Script structure instructions, sent with the system prompt
+_SCRIPT_INSTRUCTIONS = """The script should:
+1. Have a clear introduction that engages the viewer and explains what they'll learn
+2. Break down the concept into clear, logical sections
+3. Include timestamps or markers for transitions between key points
+4. Use conversational language that's easy to understand
+5. Explain any complex terminology
+6. Include 1-2 relatable examples or analogies
+7. End with a clear summary of the key takeaways
+8. Be COMPREHENSIVE and THOROUGH - don't limit the length or rush explanations
+9. Cover all aspects of the topic in sufficient detail for complete understanding
+10. Take as much time as needed to properly explain the concept - there is NO time limit
+
+Format the script like this:
+[00:00] INTRODUCTION
+[Script text goes here...]
+
+[00:30] MAIN CONCEPT 1
+[Script text goes here...]
+
+[01:15] MAIN CONCEPT 2
+[Script text goes here...]
+
+[02:00] ADDITIONAL CONCEPTS (as many sections as needed)
+[Script text goes here...]
+
+[XX:XX] CONCLUSION
+[Script text goes here...]"""
+
+# Example of the expected code layout
+_CODE_TEMPLATE = '''
+from manim import *
+import math
+import numpy as np
+
+class CustomAnimation(Scene):
+    def construct(self):
+        # Define regions for organization
+        title_region = UP * 3.5
+        main_region = ORIGIN
+        explanation_region = DOWN * 3
+        
+        # Create a title
+        title = Text("Title Text", color=BLUE).move_to(title_region)
+        self.play(Write(title))
+        self.wait(1)
+        
+        # Create content
+        text1 = Text("First explanation point", color=WHITE).scale(0.7).move_to(explanation_region)
+        self.play(FadeIn(text1))
+        self.wait(1.5)
+        
+        # Create visual elements
+        circle = Circle(radius=1.5, color=GREEN).move_to(main_region)
+        self.play(Create(circle))
+        self.wait(1)
+        
+        # Show relationships
+        arrow = Arrow(start=text1.get_top(), end=circle.get_bottom(), color=YELLOW)
+        self.play(Create(arrow))
+        self.wait(1)
+        
+        # Clean up and transition
+        self.play(FadeOut(text1), FadeOut(arrow))
+        
+        # Add more content
+        text2 = Text("Second explanation point", color=WHITE).scale(0.7).move_to(explanation_region)
+        self.play(FadeIn(text2))
+        self.wait(1.5)
+        
+        # Final cleanup
+        self.play(FadeOut(circle), FadeOut(text2), FadeOut(title))
+        self.wait(1)
+'''
+
+# System message for code generation; the per-request prompt is sent after it
+_CODE_SYSTEM_PROMPT = """You are an expert Manim programmer who generates perfect Python code for animations.
+
+FOLLOW THESE REQUIREMENTS EXACTLY:
+1. The code MUST start with 'from manim import *' and include all necessary imports
+2. The class MUST follow the exact pattern seen in this template:
+
+""" + _CODE_TEMPLATE + """
+
+3. IMPORTANT: Your response should ONLY contain Python code with no explanations outside of the code
+4. Use Text objects instead of MathTex or Tex
+5. Use Create() instead of ShowCreation()
+6. Make sure all code is properly indented inside methods
+
+For your reference, here are the key elements your code MUST contain:
+- All necessary imports at the top
+- A class that extends Scene
+- A construct method taking self parameter
+- Proper use of self.play() and self.wait()
+- Text positioning that stays within visible boundaries (-6 to 6 coordinate range)
+- Proper cleanup with FadeOut for elements no longer needed
+
+DO NOT include any markdown formatting or explanation - ONLY RETURN VALID PYTHON CODE.
+"""
+
+# Fenced code blocks in a model response
+_CODE_BLOCK_RE = re.compile(r'```(?:python)?(.*?)```', re.DOTALL)
+
 class GroqHandler:
-    def __init__(self):
-        self.api_key = os.getenv("GROQ_API_KEY")
+    def __init__(self, session: requests.Session = None, cache: ResponseCache = None):
+        self.api_key = GROQ_API_KEY
         if not self.api_key:
             raise ValueError("GROQ_API_KEY environment variable is not set")
         
+        # Reuse one keep-alive connection pool across calls
+        self.session = session or create_api_session()
+        
+        # Responses are cached across requests and restarts (shared cache unless one is given)
+        self.cache = cache
+        
         # Load animation patterns if available
         patterns_file = os.path.join(os.path.dirname(__file__), "animation_patterns.txt")
         animation_patterns = ""
@@ -91,39 +204,24 @@ The key is to create an animation that perfectly complements the script, with vi
         if animation_patterns:
             self.animation_system_prompt += f"\n\nHere are detailed best practices for Manim animations that you MUST follow:\n\n{animation_patterns}"
         
-    def generate_narration_script(self, prompt: str) -> str:
-        """Generate a narration script for the animation based on the prompt"""
-        # Enhance the user prompt for script generation
-        enhanced_prompt = f"""Create a detailed narration script for an educational video about:
-{prompt}
-
-The script should:
-1. Have a clear introduction that engages the viewer and explains what they'll learn
-2. Break down the concept into clear, logical sections
-3. Include timestamps or markers for transitions between key points
-4. Use conversational language that's easy to understand
-5. Explain any complex terminology
-6. Include 1-2 relatable examples or analogies
-7. End with a clear summary of the key takeaways
-8. Be COMPREHENSIVE and THOROUGH - don't limit the length or rush explanations
-9. Cover all aspects of the topic in sufficient detail for complete understanding
-10. Take as much time as needed to properly explain the concept - there is NO time limit
-
-Format the script like this:
-[00:00] INTRODUCTION
-[Script text goes here...]
-
-[00:30] MAIN CONCEPT 1
-[Script text goes here...]
-
-[01:15] MAIN CONCEPT 2
-[Script text goes here...]
-
-[02:00] ADDITIONAL CONCEPTS (as many sections as needed)
-[Script text goes here...]
+        # Constant script instructions live in the system message, ahead of the per-request topic
+        self._script_request_system_prompt = self.script_system_prompt + "\n\n" + _SCRIPT_INSTRUCTIONS
+        
+    def generate_narration_script(self, prompt: str, use_cache: bool = True) -> str:
+        """
+        Generate a narration script for the animation based on the prompt.
+        A cached script for an identical prompt is reused unless use_cache is False.
+        """
+        enhanced_prompt = self._script_request(prompt)
 
-[XX:XX] CONCLUSION
-[Script text goes here...]"""
+        # Identical prompts reuse a previously generated script
+        cache = self.cache or get_response_cache()
+        cache_key = self._script_cache_key(enhanced_prompt)
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print("Using cached narration script from Groq")
+                return cached
 
         # Use direct HTTP request to Groq API
         headers = {
@@ -133,7 +231,7 @@ Format the script like this:
         
         data = {
             "messages": [
-                {"role": "system", "content": self.script_system_prompt},
+                {"role": "system", "content": self._script_request_system_prompt},
                 {"role": "user", "content": enhanced_prompt}
             ],
             "model": "meta-llama/llama-4-maverick-17b-128e-instruct",
@@ -141,16 +239,17 @@ Format the script like this:
             "temperature": 0.7
         }
         
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
+        response = self.session.post(
+            GROQ_API_URL,
             headers=headers,
-            json=data
+            json=data,
+            timeout=API_TIMEOUT
         )
         
         if response.status_code != 200:
             raise Exception(f"Script generation API request failed with status {response.status_code}: {response.text}")
         
-        result = response.json()
+        result = json.loads(response.content)
         script = result["choices"][0]["message"]["content"].strip()
         
         # For debugging
@@ -160,91 +259,42 @@ Format the script like this:
         if not script or len(script) < 50:
             raise Exception("Generated narration script is too short or empty")
             
+        cache.set(cache_key, script)
         return script
     
-    def generate_manim_code(self, prompt: str, narration_script: str = None) -> str:
+    def forget_narration_script(self, prompt: str) -> None:
+        """Drop the cached script for prompt, e.g. after the generation it was used for failed"""
+        (self.cache or get_response_cache()).delete(self._script_cache_key(self._script_request(prompt)))
+    
+    def _script_request(self, prompt: str) -> str:
+        """Build the user message for a narration request"""
+        # Enhance the user prompt for script generation
+        return f"""Create a detailed narration script for an educational video about:
+{prompt}"""
+    
+    def _script_cache_key(self, enhanced_prompt: str) -> str:
+        """Cache key for the script generated from enhanced_prompt"""
+        return ResponseCache.make_key("meta-llama/llama-4-maverick-17b-128e-instruct", "script", self._script_request_system_prompt, enhanced_prompt)
+    
+    def generate_manim_code(self, prompt: str, narration_script: str = None, use_cache: bool = True) -> str:
         """
         Generate Manim code for animation using Groq.
+        Previously rendered code for an identical prompt is reused unless use_cache is False;
+        new code is only cached once cache_manim_code is called after it rendered.
         """
+        # Identical requests reuse previously generated code. The key covers the arguments as given,
+        # so cache_manim_code finds it even when the narration script is generated below
+        if use_cache:
+            cached = (self.cache or get_response_cache()).get(self._code_cache_key(prompt, narration_script))
+            if cached is not None:
+                print("Using cached Manim code from Groq")
+                return cached
+        
         # For all prompts, first generate a narration script if not provided
         if narration_script is None:
-            narration_script = self.generate_narration_script(prompt)
+            narration_script = self.generate_narration_script(prompt, use_cache=use_cache)
             
-        # Create an explicit code template to help the model understand the expected format
-        code_template = '''
-from manim import *
-import math
-import numpy as np
-
-class CustomAnimation(Scene):
-    def construct(self):
-        # Define regions for organization
-        title_region = UP * 3.5
-        main_region = ORIGIN
-        explanation_region = DOWN * 3
-        
-        # Create a title
-        title = Text("Title Text", color=BLUE).move_to(title_region)
-        self.play(Write(title))
-        self.wait(1)
-        
-        # Create content
-        text1 = Text("First explanation point", color=WHITE).scale(0.7).move_to(explanation_region)
-        self.play(FadeIn(text1))
-        self.wait(1.5)
-        
-        # Create visual elements
-        circle = Circle(radius=1.5, color=GREEN).move_to(main_region)
-        self.play(Create(circle))
-        self.wait(1)
-        
-        # Show relationships
-        arrow = Arrow(start=text1.get_top(), end=circle.get_bottom(), color=YELLOW)
-        self.play(Create(arrow))
-        self.wait(1)
-        
-        # Clean up and transition
-        self.play(FadeOut(text1), FadeOut(arrow))
-        
-        # Add more content
-        text2 = Text("Second explanation point", color=WHITE).scale(0.7).move_to(explanation_region)
-        self.play(FadeIn(text2))
-        self.wait(1.5)
-        
-        # Final cleanup
-        self.play(FadeOut(circle), FadeOut(text2), FadeOut(title))
-        self.wait(1)
-'''
-
-        # Enhanced prompt with explicit instructions for Groq
-        enhanced_prompt = f"""Generate Manim animation code based on this prompt: 
-{prompt}
-
-FOLLOW THESE REQUIREMENTS EXACTLY:
-1. The code MUST start with 'from manim import *' and include all necessary imports
-2. The class MUST follow the exact pattern seen in this template:
-
-{code_template}
-
-3. IMPORTANT: Your response should ONLY contain Python code with no explanations outside of the code
-4. Use Text objects instead of MathTex or Tex
-5. Use Create() instead of ShowCreation()
-6. Make sure all code is properly indented inside methods
-
-For your reference, here are the key elements your code MUST contain:
-- All necessary imports at the top
-- A class that extends Scene
-- A construct method taking self parameter
-- Proper use of self.play() and self.wait()
-- Text positioning that stays within visible boundaries (-6 to 6 coordinate range)
-- Proper cleanup with FadeOut for elements no longer needed
-
-DO NOT include any markdown formatting or explanation - ONLY RETURN VALID PYTHON CODE.
-"""
-
-        # Add narration script context if provided
-        if narration_script:
-            enhanced_prompt += f"\n\nFollow this narration script timing and content for your animation:\n{narration_script}\n"
+        enhanced_prompt = self._code_request(prompt, narration_script)
 
         try:
             headers = {
@@ -254,7 +304,7 @@ DO NOT include any markdown formatting or explanation - ONLY RETURN VALID PYTHON
             
             data = {
                 "messages": [
-                    {"role": "system", "content": "You are an expert Manim programmer who generates perfect Python code for animations."},
+                    {"role": "system", "content": _CODE_SYSTEM_PROMPT},
                     {"role": "user", "content": enhanced_prompt}
                 ],
                 "model": "llama3-70b-8192",
@@ -263,17 +313,18 @@ DO NOT include any markdown formatting or explanation - ONLY RETURN VALID PYTHON
             }
             
             print("Sending request to Groq API...")
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
+            response = self.session.post(
+                GROQ_API_URL,
                 headers=headers,
-                json=data
+                json=data,
+                timeout=API_TIMEOUT
             )
             
             if response.status_code != 200:
                 print(f"API request failed with status {response.status_code}: {response.text}")
                 raise Exception(f"API request failed with status {response.status_code}: {response.text}")
             
-            result = response.json()
+            result = json.loads(response.content)
             
             # Extract the code from the response
             raw_code = result['choices'][0]['message']['content']
@@ -292,11 +343,30 @@ DO NOT include any markdown formatting or explanation - ONLY RETURN VALID PYTHON
             print(f"Error in generate_manim_code: {str(e)}")
             raise Exception(f"Script generation API request failed: {str(e)}")
             
+    def cache_manim_code(self, prompt: str, code: str, narration_script: str = None) -> None:
+        """Remember code from generate_manim_code once it has rendered successfully"""
+        (self.cache or get_response_cache()).set(self._code_cache_key(prompt, narration_script), code)
+    
+    def _code_request(self, prompt: str, narration_script: str = None) -> str:
+        """Build the user message for a code request"""
+        # Variable part of the request goes last so the constant system message is a shared prefix
+        enhanced_prompt = f"""Generate Manim animation code based on this prompt: 
+{prompt}
+"""
+
+        # Add narration script context if provided
+        if narration_script:
+            enhanced_prompt += f"\n\nFollow this narration script timing and content for your animation:\n{narration_script}\n"
+        return enhanced_prompt
+    
+    def _code_cache_key(self, prompt: str, narration_script: str = None) -> str:
+        """Cache key for the code generated for a generate_manim_code call"""
+        return ResponseCache.make_key("llama3-70b-8192", "code", _CODE_SYSTEM_PROMPT, self._code_request(prompt, narration_script))
+            
     def _extract_code(self, raw_response: str) -> str:
         """Extract just the code from the raw LLM response, removing any explanations."""
         # If the response contains code blocks, extract them
-        code_block_pattern = r'```(?:python)?(.*?)```'
-        code_blocks = re.findall(code_block_pattern, raw_response, re.DOTALL)
+        code_blocks = _CODE_BLOCK_RE.findall(raw_response)
         
         if code_blocks:
             # Join all code blocks, excluding the language identifier
@@ -0,0 +1,35 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Fail fast on connect, allow long generations on read
+API_TIMEOUT = (5.0, 120.0)
+
+
+def create_api_session() -> requests.Session:
+    """Create a pooled HTTP session that keeps connections alive and retries transient failures"""
+    # Generations are billed, so only retry statuses where the provider didn't run the
+    # request, waiting as long as Retry-After asks. Once retries run out the last response
+    # is returned, so callers still report its status and error body
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 503),
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+def warm_connections(session: requests.Session, urls) -> None:
+    """Open a pooled connection to each API host so the first request skips DNS and the TLS handshake"""
+    for url in urls:
+        try:
+            # Any response will do; the connection is what we're after
+            session.head(url, timeout=(5.0, 5.0))
+        except requests.RequestException as e:
+            print(f"Warning: Could not warm connection to {url}: {str(e)}")
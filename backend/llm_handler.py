@@ -1,24 +1,17 @@
 import os
+import ast
+import functools
 import requests
 import json
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
-class LLMHandler:
-    def __init__(self):
-        self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not self.api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
-        
-        # Load animation patterns if available
-        patterns_file = os.path.join(os.path.dirname(__file__), "animation_patterns.txt")
-        animation_patterns = ""
-        if os.path.exists(patterns_file):
-            with open(patterns_file, 'r') as f:
-                animation_patterns = f.read()
-        
-        # System prompt for generating Manim code
-        self.system_prompt = """You are an expert at generating Manim animation code. 
+from .config import ANTHROPIC_API_KEY, ANTHROPIC_API_URL
+from .http_client import API_TIMEOUT, create_api_session
+from .response_cache import ResponseCache, get_response_cache
+
+# System prompt for generating Manim code
+_CODE_SYSTEM_PROMPT = """You are an expert at generating Manim animation code. 
 Given a natural language prompt, you will generate Python code using Manim to create 
 beautiful and educational 2D animations. Follow these instructions EXACTLY:
 1. ONLY return Python code with no explanations or additional text before or after
@@ -34,13 +27,9 @@ beautiful and educational 2D animations. Follow these instructions EXACTLY:
 11. CRITICAL: When explaining step-by-step concepts, use FadeOut or Transform to remove old elements before adding new ones
 12. Always plan the visual space in advance by defining clear regions for different elements
 13. When animating mathematical concepts, use a clean, organized layout with consistent positioning"""
-        
-        # Add animation patterns if available
-        if animation_patterns:
-            self.system_prompt += f"\n\nHere are best practices for Manim animations that you MUST follow:\n\n{animation_patterns}"
-        
-        # System prompt for narration script generation
-        self.script_system_prompt = """You are an expert educational content creator specializing in clear, engaging narration scripts for educational videos. Your task is to create a detailed narration script that explains complex concepts in an accessible, engaging manner.
+
+# System prompt for narration script generation
+_SCRIPT_SYSTEM_PROMPT = """You are an expert educational content creator specializing in clear, engaging narration scripts for educational videos. Your task is to create a detailed narration script that explains complex concepts in an accessible, engaging manner.
 
 USE CASE:
 This script will be used as the narration for an educational animation. The script needs to align perfectly with a visual animation that will be generated to accompany it. Your script will guide the development of the animation and serve as the voiceover that explains the concepts as they appear visually.
@@ -60,12 +49,11 @@ REQUIREMENTS:
 12. Don't rush or abbreviate explanations - take the time needed to properly explain the concept
 
 Focus on clarity, engagement, educational value, and COMPLETENESS. Aim to make the explanation as thorough as possible while maintaining audience engagement."""
-        
-    def generate_narration_script(self, prompt: str) -> str:
-        """Generate a narration script for the animation based on the prompt"""
-        # Enhance the user prompt for script generation
-        enhanced_prompt = f"""Create a detailed narration script for an educational video about:
-{prompt}
+
+# Constant parts of the per-request prompts; each call only has to splice in
+# the user prompt and narration script
+_SCRIPT_PROMPT_HEAD = "Create a detailed narration script for an educational video about:\n"
+_SCRIPT_PROMPT_TAIL = """
 
 The script should:
 1. Have a clear introduction that engages the viewer and explains what they'll learn
@@ -93,51 +81,9 @@ Format the script with timestamps like this:
 (Conclusion content here)
 """
 
-        # Using direct API call instead of the library
-        headers = {
-            "Content-Type": "application/json",
-            "X-API-Key": self.api_key,
-            "anthropic-version": "2023-06-01"
-        }
-        
-        data = {
-            "model": "claude-2.0",
-            "prompt": f"\n\nHuman: {self.script_system_prompt}\n\n{enhanced_prompt}\n\nAssistant:",
-            "max_tokens_to_sample": 4000,
-            "temperature": 0.7
-        }
-        
-        response = requests.post(
-            "https://api.anthropic.com/v1/complete",
-            headers=headers,
-            json=data
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"API request failed with status {response.status_code}: {response.text}")
-        
-        result = response.json()
-        script = result.get("completion", "")
-        print(f"Raw narration script from Claude:\n{script[:100]}...")
-        
-        if not script or len(script) < 50:
-            raise Exception("Generated narration script is too short or empty")
-            
-        return script
-            
-    def generate_manim_code(self, prompt: str, narration_script: str = None) -> str:
-        # For all prompts, try to generate with Claude
-        # Enhance the user prompt with specific requirements
-        enhanced_prompt = f"""Create a Manim animation for the following prompt:
-{prompt}
-
-"""
-        
-        # Add narration script if provided
-        if narration_script:
-            enhanced_prompt += f"Here is the narration script that the animation should follow precisely:\n{narration_script}\n\n"
-        
-        enhanced_prompt += """Requirements:
+_CODE_PROMPT_HEAD = "Create a Manim animation for the following prompt:\n"
+_NARRATION_INTRO = "Here is the narration script that the animation should follow precisely:\n"
+_CODE_REQUIREMENTS = """Requirements:
 1. Use the Scene class named 'CustomAnimation'
 2. Include all necessary imports (always start with 'from manim import *', and include 'import math' if needed)
 3. Use appropriate animations and transitions
@@ -159,10 +105,7 @@ Format the script with timestamps like this:
     - When text has dynamic positioning, verify it stays visible
 
 """
-
-        # Add narration-specific requirements if a script is provided
-        if narration_script:
-            enhanced_prompt += """17. EXTREMELY IMPORTANT: Ensure the animations align with the timestamps and sections in the narration script provided
+_NARRATION_REQUIREMENTS = """17. EXTREMELY IMPORTANT: Ensure the animations align with the timestamps and sections in the narration script provided
 18. Use appropriate self.wait() durations to match narration timing - typically:
    - 1-2 seconds for short sentences
    - 2-3 seconds for complex concepts
@@ -181,8 +124,7 @@ Format the script with timestamps like this:
     - Scaling text if needed to fit within boundaries
     - Using helper functions to ensure positions stay within boundaries
 """
-
-        enhanced_prompt += """
+_CODE_SKELETON = """
 If you can't create a specific animation for this prompt, do NOT use a generic template. Instead, create a targeted animation that addresses the prompt as specifically as possible.
 
 The code MUST start exactly like this:
@@ -209,131 +151,412 @@ class CustomAnimation(Scene):
                     return position * (threshold / magnitude)
             return position
 """
-        # Add appropriate comment based on whether there's a narration script
-        if narration_script:
-            enhanced_prompt += "        # Your code here aligned with narration timestamps"
-        else:
-            enhanced_prompt += "        # Your code here"
+_CODE_PROMPT_TAIL = _CODE_REQUIREMENTS + _CODE_SKELETON + "        # Your code here"
+_CODE_PROMPT_TAIL_WITH_NARRATION = (
+    _CODE_REQUIREMENTS + _NARRATION_REQUIREMENTS + _CODE_SKELETON
+    + "        # Your code here aligned with narration timestamps"
+)
+
+_API_SUFFIX = "\n\nAssistant:"
+
+_DEPRECATED_RE = re.compile(r"ShowCreation\(")
+_FINAL_WAIT = "self.wait(2)  # Final wait"
+
+# Comments, string literals, def/class names and *Tex( calls, so the LaTeX check
+# only flags calls, the way _uses_latex does
+_LATEX_TOKEN_RE = re.compile(
+    r"""(?P<comment>#.*)|(?P<triple>\"\"\"|''')|(?P<string>"(?:\\.|[^"\\])*"?|'(?:\\.|[^'\\])*'?)"""
+    r"""|(?P<definition>\b(?:def|class)\s+\w+)|(?P<call>\w*Tex\s*\()"""
+)
+_MARKER_RE = re.compile(r"import math|import numpy as np|math\.|np\.")
+
+
+@functools.lru_cache(maxsize=None)
+def _code_system_prompt() -> str:
+    """Build the Manim system prompt once per process, adding animation patterns if available."""
+    # Load animation patterns if available
+    patterns_file = os.path.join(os.path.dirname(__file__), "animation_patterns.txt")
+    animation_patterns = ""
+    if os.path.exists(patterns_file):
+        with open(patterns_file, 'r') as f:
+            animation_patterns = f.read()
+
+    if animation_patterns:
+        return _CODE_SYSTEM_PROMPT + f"\n\nHere are best practices for Manim animations that you MUST follow:\n\n{animation_patterns}"
+    return _CODE_SYSTEM_PROMPT
 
-        # Using direct API call instead of the library
-        headers = {
+
+@functools.lru_cache(maxsize=None)
+def _request_envelope(max_tokens: int, stream: bool) -> bytes:
+    """Serialize the constant part of a completions request body once, leaving the prompt open"""
+    fields = {
+        "model": "claude-2.0",
+        "max_tokens_to_sample": max_tokens,
+        "temperature": 0.7
+    }
+    if stream:
+        fields["stream"] = True
+    return json.dumps(fields)[:-1].encode() + b', "prompt": '
+
+
+class LLMHandler:
+    def __init__(self, session: requests.Session = None, cache: ResponseCache = None):
+        self.api_key = ANTHROPIC_API_KEY
+        if not self.api_key:
+            raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
+        
+        # System prompts are shared module-level strings; instances only hold references
+        self.system_prompt = _code_system_prompt()
+        self.script_system_prompt = _SCRIPT_SYSTEM_PROMPT
+        
+        # Human/Assistant wrapper for the completions API
+        self._script_api_prefix = f"\n\nHuman: {self.script_system_prompt}\n\n"
+        self._code_api_prefix = f"\n\nHuman: {self.system_prompt}\n\n"
+        
+        # Reuse one keep-alive connection pool across calls
+        self.session = session or create_api_session()
+        
+        # Responses are cached across requests and restarts (shared cache unless one is given)
+        self.cache = cache
+        
+    def _headers(self) -> dict:
+        """Build the request headers from the current API key"""
+        return {
             "Content-Type": "application/json",
             "X-API-Key": self.api_key,
             "anthropic-version": "2023-06-01"
         }
         
-        data = {
-            "model": "claude-2.0",
-            "prompt": f"\n\nHuman: {self.system_prompt}\n\n{enhanced_prompt}\n\nAssistant:",
-            "max_tokens_to_sample": 8000,
-            "temperature": 0.7
-        }
+    def _complete(self, prompt: str, max_tokens: int) -> str:
+        """Send a prompt to the Claude completions API and return the completion text"""
+        body = _request_envelope(max_tokens, False) + json.dumps(prompt).encode() + b"}"
         
-        response = requests.post(
-            "https://api.anthropic.com/v1/complete",
-            headers=headers,
-            json=data
+        response = self.session.post(
+            ANTHROPIC_API_URL,
+            headers=self._headers(),
+            data=body,
+            timeout=API_TIMEOUT
         )
         
         if response.status_code != 200:
             raise Exception(f"API request failed with status {response.status_code}: {response.text}")
         
-        result = response.json()
-        code = result.get("completion", "")
-        print(f"Raw response from Claude:\n{code[:100]}...")
+        result = json.loads(response.content)
+        return result.get("completion", "")
         
-        if not code or len(code) < 50:
-            raise Exception("Generated Manim code is too short or empty")
-        
-        # Validate and fix the generated code
-        code = self.validate_and_fix_code(code)
+    def _stream_complete(self, prompt: str, max_tokens: int) -> str:
+        """
+        Stream a completion from the Claude API, checking each finished line as it arrives.
+        Generation is aborted as soon as a LaTeX object shows up instead of waiting for the full response.
+        """
+        body = _request_envelope(max_tokens, True) + json.dumps(prompt).encode() + b"}"
         
-        return code
-    
-    def validate_and_fix_code(self, code: str) -> str:
-        """Validate and fix common issues in the generated Manim code."""
-        # Remove any explanatory text at the beginning
-        if not code.strip().startswith('from manim import'):
-            start_idx = code.find('from manim import')
-            if start_idx != -1:
-                code = code[start_idx:]
-            else:
-                raise Exception("Could not find Manim import statement in generated code")
-                
-        # Replace deprecated methods
-        code = code.replace("ShowCreation(", "Create(")
-            
-        # Fix missing imports
-        if "math." in code and "import math" not in code:
-            code = "import math\n" + code
+        with self.session.post(
+            ANTHROPIC_API_URL,
+            headers=self._headers(),
+            data=body,
+            timeout=API_TIMEOUT,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"API request failed with status {response.status_code}: {response.text}")
             
-        if "np." in code and "import numpy as np" not in code:
-            code = "import numpy as np\n" + code
+            # The event stream is UTF-8 but declares no charset, so don't let requests guess
+            response.encoding = "utf-8"
             
-        # Check for LaTeX (which we don't want)
-        if "MathTex(" in code or "Tex(" in code:
-            raise Exception("Generated code contains LaTeX objects which are not supported")
-        
-        # Check if all code is inside the class and method
-        fixed_lines = []
-        in_class = False
-        in_method = False
-        class_indent = ""
-        method_indent = ""
-        
-        lines = code.split('\n')
-        for i, line in enumerate(lines):
-            # Track if we're in the CustomAnimation class
-            if line.strip().startswith("class CustomAnimation"):
-                in_class = True
-                class_indent = line[:line.find("class")]
-                fixed_lines.append(line)
-                continue
+            chunks = []
+            pending = ""
+            quote = None
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                    continue
+                if not line.startswith("data:"):
+                    continue
                 
-            # Track if we're in the construct method
-            if in_class and "def construct(self" in line:
-                in_method = True
-                method_indent = line[:line.find("def")]
-                fixed_lines.append(line)
-                continue
+                payload = json.loads(line[5:])
+                if event == "error" or "error" in payload:
+                    raise Exception(f"API stream failed: {payload.get('error', payload)}")
                 
-            # Remove any self references outside of the method
-            if "self." in line and not in_method:
-                # Skip this line
-                continue
+                text = payload.get("completion", "")
+                if not text:
+                    continue
+                chunks.append(text)
                 
-            # Add line normally
-            fixed_lines.append(line)
+                # Check every completed line for LaTeX while the rest is still generating
+                pending += text
+                if "\n" in pending:
+                    *done, pending = pending.split("\n")
+                    for code_line in done:
+                        found, quote = _find_latex_call(code_line, quote)
+                        if found:
+                            raise Exception("Generated code contains LaTeX objects which are not supported")
         
-        # Ensure the code ends with a wait
-        # Find the last line inside the construct method
-        for i in range(len(fixed_lines) - 1, 0, -1):
-            line = fixed_lines[i]
-            if line.strip() and in_method and line.startswith(method_indent + " "):
-                # Check if the last line is already a wait
-                if not "self.wait" in line:
-                    # Add a wait as the last line
-                    fixed_lines.insert(i + 1, method_indent + "    self.wait(2)  # Final wait")
-                break
-                
-        fixed_code = "\n".join(fixed_lines)
+        return "".join(chunks)
         
-        # Final validation
-        if not self.validate_code(fixed_code):
-            raise Exception("Generated code is missing required elements")
+    def generate_narration_script(self, prompt: str, use_cache: bool = True) -> str:
+        """
+        Generate a narration script for the animation based on the prompt.
+        A cached script for an identical prompt is reused unless use_cache is False.
+        """
+        api_prompt = self._script_api_prompt(prompt)
+
+        # Identical prompts reuse a previously generated script
+        cache = self.cache or get_response_cache()
+        cache_key = ResponseCache.make_key("claude-2.0", "script", api_prompt)
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print("Using cached narration script from Claude")
+                return cached
+
+        script = self._complete(api_prompt, 4000)
+        print(f"Raw narration script from Claude:\n{script[:100]}...")
+        
+        if not script or len(script) < 50:
+            raise Exception("Generated narration script is too short or empty")
+            
+        cache.set(cache_key, script)
+        return script
+    
+    def forget_narration_script(self, prompt: str) -> None:
+        """Drop the cached script for prompt, e.g. after the generation it was used for failed"""
+        api_prompt = self._script_api_prompt(prompt)
+        (self.cache or get_response_cache()).delete(ResponseCache.make_key("claude-2.0", "script", api_prompt))
+    
+    def _script_api_prompt(self, prompt: str) -> str:
+        """Build the full completions prompt for a narration request"""
+        # Enhance the user prompt for script generation
+        enhanced_prompt = _SCRIPT_PROMPT_HEAD + prompt + _SCRIPT_PROMPT_TAIL
+        return self._script_api_prefix + enhanced_prompt + _API_SUFFIX
             
-        return fixed_code
+    def generate_manim_code(self, prompt: str, narration_script: str = None, use_cache: bool = True) -> str:
+        """
+        Generate Manim code for the prompt. Previously rendered code for an identical prompt is
+        reused unless use_cache is False; new code is only cached once cache_manim_code is
+        called after it rendered.
+        """
+        api_prompt = self._code_api_prompt(prompt, narration_script)
+        
+        # Identical prompts reuse previously generated code
+        if use_cache:
+            cached = (self.cache or get_response_cache()).get(self._code_cache_key(api_prompt))
+            if cached is not None:
+                print("Using cached Manim code from Claude")
+                return cached
+        
+        code = self._stream_complete(api_prompt, 8000)
+        print(f"Raw response from Claude:\n{code[:100]}...")
+        
+        if not code or len(code) < 50:
+            raise Exception("Generated Manim code is too short or empty")
+        
+        # Validate and fix the generated code
+        return self.validate_and_fix_code(code)
+    
+    def cache_manim_code(self, prompt: str, code: str, narration_script: str = None) -> None:
+        """Remember code from generate_manim_code once it has rendered successfully"""
+        api_prompt = self._code_api_prompt(prompt, narration_script)
+        (self.cache or get_response_cache()).set(self._code_cache_key(api_prompt), code)
+    
+    def _code_api_prompt(self, prompt: str, narration_script: str = None) -> str:
+        """Build the full completions prompt for a code request"""
+        # Enhance the user prompt with specific requirements
+        if narration_script:
+            enhanced_prompt = (
+                _CODE_PROMPT_HEAD + prompt + "\n\n"
+                + _NARRATION_INTRO + narration_script + "\n\n"
+                + _CODE_PROMPT_TAIL_WITH_NARRATION
+            )
+        else:
+            enhanced_prompt = _CODE_PROMPT_HEAD + prompt + "\n\n" + _CODE_PROMPT_TAIL
+        
+        return self._code_api_prefix + enhanced_prompt + _API_SUFFIX
+    
+    def _code_cache_key(self, api_prompt: str) -> str:
+        """Cache key for the code generated from api_prompt"""
+        return ResponseCache.make_key("claude-2.0", "code", api_prompt)
+    
+    def validate_and_fix_code(self, code: str) -> str:
+        """Validate and fix common issues in the generated Manim code."""
+        return _validate_and_fix_code_impl(code)
 
     def validate_code(self, code: str) -> bool:
         """
         Basic validation of generated Manim code.
         Returns True if the code appears valid, False otherwise.
         """
-        required_elements = [
-            "from manim import",
-            "class CustomAnimation(Scene):",
-            "def construct(self):"
-        ]
-        
-        is_valid = all(element in code for element in required_elements)
-        return is_valid 
\ No newline at end of file
+        return _has_required_elements(code)
+
+
+@functools.lru_cache(maxsize=512)
+def _validate_and_fix_code_impl(code: str) -> str:
+    """
+    Validate and fix common issues in the generated Manim code.
+    Results are memoized since identical completions often come back repeatedly.
+    """
+    # Remove any explanatory text at the beginning
+    start_idx = code.find('from manim import')
+    if start_idx == -1:
+        raise Exception("Could not find Manim import statement in generated code")
+    if code[:start_idx].strip():
+        code = code[start_idx:]
+
+    # Replace deprecated methods
+    code = _DEPRECATED_RE.sub("Create(", code)
+
+    # Collect import and LaTeX markers in a single scan
+    markers = {m.group(0) for m in _MARKER_RE.finditer(code)}
+
+    # Fix missing imports
+    if "math." in markers and "import math" not in markers:
+        code = "import math\n" + code
+
+    if "np." in markers and "import numpy as np" not in markers:
+        code = "import numpy as np\n" + code
+
+    # Parse once and apply structural fixes from the syntax tree. Code that
+    # doesn't parse is passed through as-is; SceneGenerator repairs syntax
+    # errors when Manim reports them.
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        tree = None
+
+    if tree is None:
+        if _mentions_latex_call(code):
+            raise Exception("Generated code contains LaTeX objects which are not supported")
+        fixed_code = code
+    else:
+        # Check for LaTeX (which we don't want)
+        if _uses_latex(tree):
+            raise Exception("Generated code contains LaTeX objects which are not supported")
+        fixed_code = _fix_code_structure(code, tree)
+
+    # Final validation
+    if not _has_required_elements(fixed_code):
+        raise Exception("Generated code is missing required elements")
+
+    return fixed_code
+
+
+def _uses_latex(tree: ast.AST) -> bool:
+    """Return True if the code calls Tex, MathTex or another *Tex class."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", "")
+            if name.endswith("Tex"):
+                return True
+    return False
+
+
+def _find_latex_call(line: str, quote: str = None) -> Tuple[bool, str]:
+    """
+    Scan one line for a *Tex( call outside comments, string literals and def/class
+    names, the way _uses_latex sees the code. quote is the triple quote left open by
+    an earlier line, if any; returns whether a call was found and the quote still open.
+    """
+    pos = 0
+    while pos < len(line):
+        if quote:
+            end = line.find(quote, pos)
+            if end == -1:
+                return False, quote
+            pos = end + 3
+            quote = None
+            continue
+
+        match = _LATEX_TOKEN_RE.search(line, pos)
+        if not match or match.lastgroup == "comment":
+            break
+        if match.lastgroup == "triple":
+            quote = match.group(0)
+        elif match.lastgroup == "call":
+            return True, None
+        pos = match.end()
+    return False, quote
+
+
+def _mentions_latex_call(code: str) -> bool:
+    """Line by line LaTeX check for code that doesn't parse."""
+    quote = None
+    for line in code.split("\n"):
+        found, quote = _find_latex_call(line, quote)
+        if found:
+            return True
+    return False
+
+
+def _fix_code_structure(code: str, tree: ast.Module) -> str:
+    """
+    Remove statements that reference 'self' outside of a method and make sure
+    the construct method of CustomAnimation ends with a wait.
+    """
+    lines = code.split('\n')
+    dropped = set()
+    insert_after = None
+    wait_line = None
+
+    scopes = [tree.body]
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            scopes.append(node.body)
+
+    for body in scopes:
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            # Remove any self references outside of a method
+            if any(isinstance(n, ast.Name) and n.id == "self" for n in ast.walk(node)):
+                dropped.update(range(node.lineno, node.end_lineno + 1))
+
+    # Ensure the construct method ends with a wait
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "CustomAnimation":
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == "construct":
+                    last = item.body[-1]
+                    if not _is_self_wait(last):
+                        first_line = lines[item.body[0].lineno - 1]
+                        indent = first_line[:len(first_line) - len(first_line.lstrip())]
+                        insert_after = last.end_lineno
+                        wait_line = indent + _FINAL_WAIT
+
+    # Nothing to fix, hand back the original string
+    if not dropped and insert_after is None:
+        return code
+
+    # Splice the wait onto the last construct line rather than shifting the list
+    if insert_after is not None:
+        lines[insert_after - 1] += "\n" + wait_line
+    if dropped:
+        lines = [line for line_no, line in enumerate(lines, start=1) if line_no not in dropped]
+
+    return "\n".join(lines)
+
+
+def _is_self_wait(node: ast.stmt) -> bool:
+    """Return True if the statement is a self.wait(...) call."""
+    return (
+        isinstance(node, ast.Expr)
+        and isinstance(node.value, ast.Call)
+        and isinstance(node.value.func, ast.Attribute)
+        and node.value.func.attr == "wait"
+        and isinstance(node.value.func.value, ast.Name)
+        and node.value.func.value.id == "self"
+    )
+
+
+def _has_required_elements(code: str) -> bool:
+    """Check that the code has the imports, class and method Manim needs."""
+    required_elements = [
+        "from manim import",
+        "class CustomAnimation(Scene):",
+        "def construct(self):"
+    ]
+    
+    return all(element in code for element in required_elements)
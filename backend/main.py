@@ -1,29 +1,178 @@
 import os
-import sys
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, PlainTextResponse
+import stat
+import shutil
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from dotenv import load_dotenv
 import tempfile
+import threading
 import uuid
-from typing import Literal, Optional, Dict, Any
+import json
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Literal, Optional, Dict, Tuple
 
-# Add the current directory to sys.path for module imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from .llm_handler import LLMHandler
+from .groq_handler import GroqHandler
+from .scene_generator import SceneGenerator
+from .prompt_optimizer import PromptOptimizer
+from .config import ANTHROPIC_API_KEY, ANTHROPIC_API_URL, GROQ_API_KEY, GROQ_API_URL
+from .http_client import create_api_session, warm_connections
 
-from llm_handler import LLMHandler
-from groq_handler import GroqHandler
-from scene_generator import SceneGenerator
-from prompt_optimizer import PromptOptimizer
+# Output locations, resolved once at import
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(BASE_DIR)
+OUTPUTS_DIR = os.path.join(PARENT_DIR, "outputs")
+SCRIPTS_DIR = os.path.join(OUTPUTS_DIR, "scripts")
+NARRATIONS_DIR = os.path.join(OUTPUTS_DIR, "narrations")
+PROMPTS_DIR = os.path.join(OUTPUTS_DIR, "prompts")
+# Finished videos are linked here under a flat {id}.mp4 name so a static mount can serve them
+RENDERS_DIR = os.path.join(OUTPUTS_DIR, "renders")
 
-# Load environment variables
-load_dotenv()
+# Manim quality folders to check first when serving a rendered video
+PREFERRED_QUALITIES = ("720p30", "1080p60")
+
+# When set (e.g. "/protected-outputs/"), videos are handed to a fronting nginx via
+# X-Accel-Redirect so the file bytes never pass through Python
+ACCEL_REDIRECT_PREFIX = os.getenv("ACCEL_REDIRECT_PREFIX")
+
+# Handler classes by name, used both at startup and to retry a handler that failed to initialize
+HANDLER_FACTORIES = {
+    "claude": LLMHandler,
+    "groq": GroqHandler,
+    "optimizer": PromptOptimizer,
+}
+
+# Generated files are named by fresh UUIDs and never change, so clients may cache them indefinitely
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Number of reusable work directories, which also bounds how many generations render at once
+WORK_DIR_POOL_SIZE = 4
+
+def write_text_file(path: str, content: str) -> None:
+    """Write a text output file"""
+    with open(path, "w") as f:
+        f.write(content)
+
+def remove_file(path: str) -> None:
+    """Remove a file if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def clear_work_dir(work_dir: str) -> None:
+    """Remove everything a generation left in a work directory so it can be reused"""
+    for entry in os.scandir(work_dir):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            os.unlink(entry.path)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the output directories once instead of on every request
+    for directory in (OUTPUTS_DIR, SCRIPTS_DIR, NARRATIONS_DIR, PROMPTS_DIR, RENDERS_DIR):
+        os.makedirs(directory, exist_ok=True)
+    
+    # Create the handlers once and share them across requests, along with one keep-alive HTTP session
+    app.state.http = create_api_session()
+    app.state.handlers = {}
+    for name, factory in HANDLER_FACTORIES.items():
+        try:
+            app.state.handlers[name] = factory(session=app.state.http)
+        except Exception as e:
+            # Missing API keys shouldn't break startup; the error surfaces when the handler is used
+            print(f"Warning: Could not initialize {name} handler: {str(e)}")
+    
+    # Prime DNS/TLS for the configured providers in the background so startup isn't held up
+    warm_urls = [url for key, url in ((ANTHROPIC_API_KEY, ANTHROPIC_API_URL), (GROQ_API_KEY, GROQ_API_URL)) if key]
+    threading.Thread(target=warm_connections, args=(app.state.http, warm_urls), daemon=True).start()
+    app.state.scene_generator = SceneGenerator()
+    
+    # Renders are submitted to their own bounded pool by submit_render, so they can't starve
+    # the default threadpool, which is left at its default size for the short blocking calls
+    app.state.render_pool = ThreadPoolExecutor(max_workers=WORK_DIR_POOL_SIZE, thread_name_prefix="render")
+    
+    # Pre-create the work directory pool, on tmpfs when available
+    app.state.work_root = tempfile.mkdtemp(prefix="video8-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    app.state.work_dirs = asyncio.Queue()
+    for i in range(WORK_DIR_POOL_SIZE):
+        work_dir = os.path.join(app.state.work_root, str(i))
+        os.mkdir(work_dir)
+        app.state.work_dirs.put_nowait(work_dir)
+    app.state.cleanup_tasks = set()
+    yield
+    app.state.render_pool.shutdown(wait=False, cancel_futures=True)
+    app.state.scene_generator.close()
+    app.state.http.close()
+    shutil.rmtree(app.state.work_root, ignore_errors=True)
+
+def submit_render(app: FastAPI, render) -> Future:
+    """Start a blocking Manim render on the render pool; await it with asyncio.wrap_future"""
+    return app.state.render_pool.submit(render)
+
+async def recycle_work_dir(app: FastAPI, work_dir: str) -> None:
+    """Wipe a work directory off the event loop, then return it to the pool"""
+    try:
+        await run_in_threadpool(clear_work_dir, work_dir)
+    finally:
+        app.state.work_dirs.put_nowait(work_dir)
+
+def schedule_recycle(app: FastAPI, work_dir: str) -> None:
+    """Recycle a work directory in the background so the response doesn't wait on it"""
+    task = asyncio.create_task(recycle_work_dir(app, work_dir))
+    app.state.cleanup_tasks.add(task)
+    task.add_done_callback(app.state.cleanup_tasks.discard)
+
+def recycle_after_render(app: FastAPI, work_dir: str, render_future: Optional[Future]) -> None:
+    """Recycle a work directory once no render is using it any more"""
+    if render_future is None or render_future.done():
+        schedule_recycle(app, work_dir)
+        return
+    
+    # A disconnected client cancels the await, but not the render already running on
+    # the pool thread, so the directory is only wiped once Manim is done with it
+    loop = asyncio.get_running_loop()
+    
+    def on_done(_):
+        try:
+            loop.call_soon_threadsafe(schedule_recycle, app, work_dir)
+        except RuntimeError:
+            # The loop has shut down and the work root is removed with it
+            pass
+    
+    render_future.add_done_callback(on_done)
+
+def forget_responses(prompt_optimizer, llm_handler, prompt: str, enhanced_prompt: str) -> None:
+    """Drop the cached enhanced prompt and narration script a failed generation used"""
+    try:
+        if prompt_optimizer is not None:
+            prompt_optimizer.forget_enhanced_prompt(prompt)
+        if llm_handler is not None:
+            llm_handler.forget_narration_script(enhanced_prompt)
+    except Exception as e:
+        print(f"Warning: Could not invalidate cached responses: {str(e)}")
+
+def get_handler(app: FastAPI, name: str):
+    """Return the shared handler, or build one so the original initialization error is raised"""
+    handler = app.state.handlers.get(name)
+    if handler is None:
+        handler = HANDLER_FACTORIES[name](session=app.state.http)
+        app.state.handlers[name] = handler
+    return handler
 
 app = FastAPI(
     title="Prompt-to-2D-Video Generator",
     description="Convert natural language prompts into animated videos using LLM and Manim",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware to allow cross-origin requests from frontend
@@ -35,11 +184,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles that marks generated files as cacheable forever (ETag/304 handling is built in)"""
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+# Serve generated files straight from disk; the directories are created by the lifespan
+app.mount("/static/videos", ImmutableStaticFiles(directory=RENDERS_DIR, check_dir=False), name="videos")
+app.mount("/static/scripts", ImmutableStaticFiles(directory=SCRIPTS_DIR, check_dir=False), name="scripts")
+app.mount("/static/narrations", ImmutableStaticFiles(directory=NARRATIONS_DIR, check_dir=False), name="narrations")
+
 class PromptRequest(BaseModel):
     prompt: str
     model: Optional[Literal["claude", "groq"]] = "claude"
     optimize_prompt: Optional[bool] = True
     use_modular: Optional[bool] = True  # Use the new modular scene generation approach
+    use_cache: Optional[bool] = True  # Set to False to regenerate instead of reusing cached LLM responses
 
 class GenerationResponse(BaseModel):
     video_path: str
@@ -48,179 +210,291 @@ class GenerationResponse(BaseModel):
     enhanced_prompt: Optional[str] = None
     message: str
 
-@app.post("/generate", response_model=GenerationResponse)
-async def generate_video(request: PromptRequest):
+async def generation_stages(request: PromptRequest, app: FastAPI):
+    """
+    Run the generation pipeline, yielding (stage, data) as each stage finishes.
+    The final stage is "complete" with the GenerationResponse.
+    """
     # Create unique ID for this generation
     generation_id = str(uuid.uuid4())
     
+    # Track which output files may exist so a failure only cleans up what was started
+    wrote_script = False
+    wrote_narration = False
+    
+    # Handlers whose cached responses fed this generation, forgotten if it fails
+    prompt_optimizer = None
+    llm_handler = None
+    enhanced_prompt = request.prompt
+    
     try:
         # Initialize prompt optimizer if needed
-        enhanced_prompt = request.prompt
         if request.optimize_prompt:
             try:
-                prompt_optimizer = PromptOptimizer()
-                enhanced_prompt = prompt_optimizer.enhance_prompt(request.prompt)
+                optimizer = get_handler(app, "optimizer")
+                # Run the blocking API call off the event loop
+                enhanced_prompt = await run_in_threadpool(
+                    optimizer.enhance_prompt, request.prompt, use_cache=request.use_cache
+                )
+                prompt_optimizer = optimizer
                 print(f"Enhanced prompt: {enhanced_prompt[:200]}...")
             except Exception as e:
                 print(f"Warning: Could not optimize prompt: {str(e)}")
                 print("Continuing with original prompt...")
                 enhanced_prompt = request.prompt
+            yield "enhanced_prompt", {"enhanced_prompt": enhanced_prompt}
         else:
             enhanced_prompt = request.prompt
         
-        # Initialize handlers based on selected model
-        if request.model == "claude":
-            llm_handler = LLMHandler()
-        else:
-            llm_handler = GroqHandler()
+        # Use the shared handler for the selected model
+        llm_handler = get_handler(app, "claude" if request.model == "claude" else "groq")
             
-        # Generate narration script first
-        narration_script = llm_handler.generate_narration_script(enhanced_prompt)
-        
-        # Save the script to a file
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(base_dir)
-        scripts_dir = os.path.join(parent_dir, "outputs", "scripts")
-        os.makedirs(scripts_dir, exist_ok=True)
+        # Generate narration script first, off the event loop like every other blocking LLM call
+        narration_script = await run_in_threadpool(
+            llm_handler.generate_narration_script, enhanced_prompt, use_cache=request.use_cache
+        )
+        yield "narration_script", {"generation_id": generation_id, "narration_script": narration_script}
         
         # Save the narration script to a file
-        narration_dir = os.path.join(parent_dir, "outputs", "narrations")
-        os.makedirs(narration_dir, exist_ok=True)
-        narration_path = os.path.join(narration_dir, f"{generation_id}.txt")
-        with open(narration_path, "w") as f:
-            f.write(narration_script)
+        narration_path = os.path.join(NARRATIONS_DIR, f"{generation_id}.txt")
+        wrote_narration = True
+        writes = [run_in_threadpool(write_text_file, narration_path, narration_script)]
         
         # Also save the enhanced prompt if it was used
         if request.optimize_prompt:
-            prompts_dir = os.path.join(parent_dir, "outputs", "prompts")
-            os.makedirs(prompts_dir, exist_ok=True)
-            prompt_path = os.path.join(prompts_dir, f"{generation_id}.txt")
-            with open(prompt_path, "w") as f:
-                f.write(f"Original prompt: {request.prompt}\n\nEnhanced prompt: {enhanced_prompt}")
+            prompt_path = os.path.join(PROMPTS_DIR, f"{generation_id}.txt")
+            writes.append(run_in_threadpool(
+                write_text_file,
+                prompt_path,
+                f"Original prompt: {request.prompt}\n\nEnhanced prompt: {enhanced_prompt}"
+            ))
+        
+        # Write the files concurrently, off the event loop
+        await asyncio.gather(*writes)
         
-        # Create temporary directory for video output
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Initialize scene generator
-            scene_generator = SceneGenerator()
+        # Lease a work directory for the scene files from the pool
+        work_dirs = app.state.work_dirs
+        temp_dir = await work_dirs.get()
+        render_future = None
+        try:
+            # Use the shared scene generator
+            scene_generator = app.state.scene_generator
             
             # Check if should use modular approach (from request parameter)
             use_modular = request.use_modular
             
             if use_modular:
                 # Use the new modular approach that breaks down the animation into scenes
-                video_id = scene_generator.create_modular_video(
+                render_future = submit_render(app, functools.partial(
+                    scene_generator.create_modular_video,
                     prompt=enhanced_prompt,
                     narration_script=narration_script,
                     output_dir=temp_dir,
                     generation_id=generation_id,
-                    llm_handler=llm_handler
-                )
+                    llm_handler=llm_handler,
+                    use_cache=request.use_cache
+                ))
+                video_id = await asyncio.wrap_future(render_future)
                 
                 # Save the generated code from the temp directory
                 temp_file_path = os.path.join(temp_dir, f"scene_{generation_id}.py")
                 if os.path.exists(temp_file_path):
-                    script_path = os.path.join(scripts_dir, f"{generation_id}.py")
-                    with open(temp_file_path, "r") as src, open(script_path, "w") as dst:
-                        manim_code = src.read()
-                        dst.write(manim_code)
+                    script_path = os.path.join(SCRIPTS_DIR, f"{generation_id}.py")
+                    wrote_script = True
+                    await run_in_threadpool(shutil.copyfile, temp_file_path, script_path)
             else:
                 # Use the original approach
-                manim_code = llm_handler.generate_manim_code(enhanced_prompt, narration_script)
+                manim_code = await run_in_threadpool(
+                    llm_handler.generate_manim_code, enhanced_prompt, narration_script, use_cache=request.use_cache
+                )
                 
                 # Save the script
-                script_path = os.path.join(scripts_dir, f"{generation_id}.py")
-                with open(script_path, "w") as f:
-                    f.write(manim_code)
+                script_path = os.path.join(SCRIPTS_DIR, f"{generation_id}.py")
+                wrote_script = True
+                await run_in_threadpool(write_text_file, script_path, manim_code)
                 
                 # Generate and render the video with the original method
-                video_id = scene_generator.create_video(
+                render_future = submit_render(app, functools.partial(
+                    scene_generator.create_video,
                     manim_code,
                     output_dir=temp_dir,
                     generation_id=generation_id
-                )
+                ))
+                video_id = await asyncio.wrap_future(render_future)
+                
+                # Only code that rendered is cached, so a broken response isn't served again
+                await run_in_threadpool(llm_handler.cache_manim_code, enhanced_prompt, manim_code, narration_script)
             
-            # Return the video_id and script_id which will be used to construct the URLs
-            return GenerationResponse(
-                video_path=f"/outputs/{video_id}",
-                script_path=f"/scripts/{generation_id}",
-                narration_script=narration_script,
-                enhanced_prompt=enhanced_prompt if request.optimize_prompt else None,
-                message="Video and script generated successfully!"
-            )
+            # Link the rendered file into the static renders directory
+            await run_in_threadpool(publish_video, video_id)
+        finally:
+            # Wipe and return the work directory in the background so the response doesn't wait on it
+            recycle_after_render(app, temp_dir, render_future)
             
-    except Exception as e:
-        # Delete any partially created files
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(base_dir)
-        
-        # Try to delete script file if it exists
-        script_path = os.path.join(parent_dir, "outputs", "scripts", f"{generation_id}.py")
-        if os.path.exists(script_path):
-            os.remove(script_path)
+    except Exception:
+        # Delete any partially created files, skipping the ones we never started writing
+        if wrote_script:
+            remove_file(os.path.join(SCRIPTS_DIR, f"{generation_id}.py"))
             
-        # Try to delete narration file if it exists
-        narration_path = os.path.join(parent_dir, "outputs", "narrations", f"{generation_id}.txt")
-        if os.path.exists(narration_path):
-            os.remove(narration_path)
+        if wrote_narration:
+            remove_file(os.path.join(NARRATIONS_DIR, f"{generation_id}.txt"))
+        
+        # Don't serve the narration and enhanced prompt of a failed generation again,
+        # so retrying the same prompt starts from fresh responses
+        await run_in_threadpool(forget_responses, prompt_optimizer, llm_handler, request.prompt, enhanced_prompt)
+        raise
+    
+    # Return the video_id and script_id which will be used to construct the URLs
+    yield "complete", GenerationResponse(
+        video_path=f"/outputs/{video_id}",
+        script_path=f"/scripts/{generation_id}",
+        narration_script=narration_script,
+        enhanced_prompt=enhanced_prompt if request.optimize_prompt else None,
+        message="Video and script generated successfully!"
+    )
+
+@app.post("/generate", response_model=GenerationResponse)
+async def generate_video(request: PromptRequest, http_request: Request):
+    try:
+        async for stage, data in generation_stages(request, http_request.app):
+            if stage == "complete":
+                result = data
+        return result
             
+    except Exception as e:
         # Raise a detailed HTTP exception
         error_message = f"Error during video generation: {str(e)}"
         print(error_message)
         raise HTTPException(status_code=500, detail=error_message)
 
+@app.post("/generate_stream")
+async def generate_video_stream(request: PromptRequest, http_request: Request):
+    """
+    Same as /generate, but sends each stage as a server-sent event as soon as it finishes,
+    so the enhanced prompt and narration reach the client before the render completes.
+    """
+    async def events():
+        try:
+            async for stage, data in generation_stages(request, http_request.app):
+                yield f"event: {stage}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+        except Exception as e:
+            error_message = f"Error during video generation: {str(e)}"
+            print(error_message)
+            yield f"event: error\ndata: {json.dumps({'detail': error_message})}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+def stat_file(path: str) -> Optional[os.stat_result]:
+    """Return the stat result for a regular file, or None if there isn't one"""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return stat_result if stat.S_ISREG(stat_result.st_mode) else None
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Caching headers for a generated file, keyed by its UUID"""
+    return {"ETag": f'"{etag}"', "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Check whether the client already holds the file with this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return f'"{etag}"' in [tag.strip(" W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+def video_response(location: str, stat_result: os.stat_result, video_id: str) -> Response:
+    """Serve a rendered video, letting nginx send the file when configured to"""
+    headers = cache_headers(video_id)
+    if ACCEL_REDIRECT_PREFIX:
+        relative_path = os.path.relpath(location, OUTPUTS_DIR).replace(os.sep, "/")
+        headers["X-Accel-Redirect"] = ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative_path
+        return Response(media_type="video/mp4", headers=headers)
+    # Reuse the stat we already have instead of letting FileResponse stat the file again
+    return FileResponse(location, media_type="video/mp4", stat_result=stat_result, headers=headers)
+
+def find_video(video_id: str) -> Tuple[Optional[str], Optional[os.stat_result]]:
+    """Locate a rendered video in the outputs folder, returning its path and stat result"""
+    video_name = f"{video_id}.mp4"
+    
+    # Check direct outputs folder first
+    direct_path = os.path.join(OUTPUTS_DIR, video_name)
+    stat_result = stat_file(direct_path)
+    if stat_result is not None:
+        return direct_path, stat_result
+    
+    # Then look through the quality folders Manim rendered into, listed with a single directory read
+    scene_dir = os.path.join(OUTPUTS_DIR, "videos", f"scene_{video_id}")
+    try:
+        with os.scandir(scene_dir) as entries:
+            quality_dirs = {entry.name: entry.path for entry in entries if entry.is_dir()}
+    except OSError:
+        quality_dirs = {}
+    
+    # Prefer the default render quality, then anything else that was rendered
+    ordered = [q for q in PREFERRED_QUALITIES if q in quality_dirs]
+    ordered += sorted(q for q in quality_dirs if q not in PREFERRED_QUALITIES)
+    for quality in ordered:
+        location = os.path.join(quality_dirs[quality], video_name)
+        stat_result = stat_file(location)
+        if stat_result is not None:
+            return location, stat_result
+    
+    return None, None
+
+def publish_video(video_id: str) -> None:
+    """Hard-link a rendered video into the renders directory so the static mount can serve it"""
+    location, _ = find_video(video_id)
+    if location is None:
+        return
+    
+    published_path = os.path.join(RENDERS_DIR, f"{video_id}.mp4")
+    remove_file(published_path)
+    try:
+        os.link(location, published_path)
+    except OSError:
+        # Hard links can't cross filesystems, so fall back to a copy
+        shutil.copyfile(location, published_path)
+
 @app.get("/outputs/{video_id}")
-async def get_video(video_id: str):
-    # Get the base directory and parent directory
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    parent_dir = os.path.dirname(base_dir)
-    
-    # Look for the video in different possible locations where Manim might have saved it
-    possible_locations = [
-        # Check direct outputs folder first
-        os.path.join(parent_dir, "outputs", f"{video_id}.mp4"),
-        # Check in video folders with quality settings
-        os.path.join(parent_dir, "outputs", "videos", f"scene_{video_id}", "720p30", f"{video_id}.mp4"),
-        os.path.join(parent_dir, "outputs", "videos", f"scene_{video_id}", "1080p60", f"{video_id}.mp4"),
-    ]
-    
-    # Try each location
-    for location in possible_locations:
-        if os.path.exists(location):
-            return FileResponse(location)
+async def get_video(video_id: str, request: Request):
+    # Videos published at render time are served by the static mount
+    if stat_file(os.path.join(RENDERS_DIR, f"{video_id}.mp4")) is not None:
+        return RedirectResponse(f"/static/videos/{video_id}.mp4", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+    
+    # Fall back to looking through the render folders for older videos
+    location, stat_result = find_video(video_id)
+    if location is not None:
+        if is_not_modified(request, video_id):
+            return Response(status_code=304, headers=cache_headers(video_id))
+        return video_response(location, stat_result, video_id)
     
     # If we got here, we couldn't find the video
+    video_name = f"{video_id}.mp4"
+    scene_dir = os.path.join(OUTPUTS_DIR, "videos", f"scene_{video_id}")
+    possible_locations = [os.path.join(OUTPUTS_DIR, video_name)] + [os.path.join(scene_dir, q, video_name) for q in PREFERRED_QUALITIES]
     raise HTTPException(status_code=404, detail=f"Video not found. Tried locations: {possible_locations}")
 
-@app.get("/scripts/{script_id}", response_class=PlainTextResponse)
+@app.get("/scripts/{script_id}", response_class=RedirectResponse, status_code=307)
 async def get_script(script_id: str):
-    # Get the base directory and parent directory
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    parent_dir = os.path.dirname(base_dir)
-    
     # Get the script path
-    script_path = os.path.join(parent_dir, "outputs", "scripts", f"{script_id}.py")
+    script_path = os.path.join(SCRIPTS_DIR, f"{script_id}.py")
     
-    if os.path.exists(script_path):
-        with open(script_path, "r") as f:
-            script_content = f.read()
-        return script_content
+    # Kept for existing links; the file itself is served by the static mount
+    if stat_file(script_path) is not None:
+        return RedirectResponse(f"/static/scripts/{script_id}.py", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
     
     # If we got here, we couldn't find the script
     raise HTTPException(status_code=404, detail=f"Script not found at {script_path}")
 
-@app.get("/narrations/{script_id}", response_class=PlainTextResponse)
+@app.get("/narrations/{script_id}", response_class=RedirectResponse, status_code=307)
 async def get_narration(script_id: str):
-    # Get the base directory and parent directory
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    parent_dir = os.path.dirname(base_dir)
-    
     # Get the narration script path
-    narration_path = os.path.join(parent_dir, "outputs", "narrations", f"{script_id}.txt")
+    narration_path = os.path.join(NARRATIONS_DIR, f"{script_id}.txt")
     
-    if os.path.exists(narration_path):
-        with open(narration_path, "r") as f:
-            narration_content = f.read()
-        return narration_content
+    # Kept for existing links; the file itself is served by the static mount
+    if stat_file(narration_path) is not None:
+        return RedirectResponse(f"/static/narrations/{script_id}.txt", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
     
     # If we got here, we couldn't find the narration script
     raise HTTPException(status_code=404, detail=f"Narration script not found at {narration_path}")
@@ -232,20 +506,22 @@ async def health_check():
 
 # Keep the old route for compatibility
 @app.get("/video/{video_id}")
-async def get_video_old(video_id: str):
-    return await get_video(video_id)
+async def get_video_old(video_id: str, request: Request):
+    return await get_video(video_id, request)
 
 if __name__ == "__main__":
     import uvicorn
-    # Create outputs directory if it doesn't exist
-    # Ensure it's created in the parent directory
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    parent_dir = os.path.dirname(base_dir)
-    outputs_dir = os.path.join(parent_dir, "outputs")
-    os.makedirs(outputs_dir, exist_ok=True)
-    
-    # Create scripts directory within outputs
-    scripts_dir = os.path.join(outputs_dir, "scripts")
-    os.makedirs(scripts_dir, exist_ok=True)
-    
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # Output directories are created by the app lifespan on startup
+    # Each worker renders with Manim and keeps its own handlers and L1 cache, so
+    # scale out explicitly with WEB_CONCURRENCY rather than by core count
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run(
+        "backend.main:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+        app_dir=PARENT_DIR,
+        # uvloop and httptools are picked up automatically when installed (uvicorn[standard])
+        loop="auto",
+        http="auto"
+    ) 
\ No newline at end of file
@@ -5,26 +5,31 @@ This module enhances user prompts to generate more detailed, comprehensive,
 and educational animations.
 """
 
-import os
 import requests
 import json
 import re
 from typing import Dict, Any, Optional
 
+from .config import ANTHROPIC_API_URL, GROQ_API_URL, OPTIMIZER_API_KEY, OPTIMIZER_API_TYPE
+from .http_client import API_TIMEOUT, create_api_session
+from .response_cache import ResponseCache, get_response_cache
+
 class PromptOptimizer:
-    def __init__(self):
+    def __init__(self, session: requests.Session = None, cache: ResponseCache = None):
         """Initialize the prompt optimizer."""
-        self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not self.api_key:
-            # Try to use Groq if Anthropic is not available
-            self.api_key = os.getenv("GROQ_API_KEY")
-            self.api_type = "groq"
-        else:
-            self.api_type = "anthropic"
+        # Provider and key are resolved once in config
+        self.api_key = OPTIMIZER_API_KEY
+        self.api_type = OPTIMIZER_API_TYPE
             
         if not self.api_key:
             raise ValueError("Neither ANTHROPIC_API_KEY nor GROQ_API_KEY environment variables are set")
             
+        # Reuse one keep-alive connection pool across calls
+        self.session = session or create_api_session()
+        
+        # Enhanced prompts are cached across requests and restarts (shared cache unless one is given)
+        self.cache = cache
+            
         # System prompt for enhancing user prompts
         self.system_prompt = """You are an expert at enhancing user prompts for educational animation generation. 
 Your task is to take a brief user prompt and expand it into a detailed, comprehensive instruction 
@@ -42,13 +47,35 @@ Here's what you need to do:
 The goal is to transform a brief prompt like "explain photosynthesis" into a detailed prompt 
 that will guide the creation of a comprehensive, visually rich, and educational animation.
 """
+        
+        # Serialize the constant parts of the request bodies once; only the
+        # enhancement request is encoded per call
+        if self.api_type == "anthropic":
+            # The system prompt sits inside the prompt string, so keep its JSON string open
+            self._body_prefix = (
+                b'{"model": "claude-2.0", "max_tokens_to_sample": 1500, "temperature": 0.7, "prompt": '
+                + json.dumps(f"\n\nHuman: {self.system_prompt}\n\n")[:-1].encode()
+            )
+            self._body_suffix = b"}"
+        else:
+            self._body_prefix = (
+                b'{"messages": [{"role": "system", "content": '
+                + json.dumps(self.system_prompt).encode()
+                + b'}, {"role": "user", "content": '
+            )
+            self._body_suffix = (
+                b'}], "model": "meta-llama/llama-4-maverick-17b-128e-instruct", '
+                b'"max_tokens": 1500, "temperature": 0.7}'
+            )
 
-    def enhance_prompt(self, user_prompt: str) -> str:
+    def enhance_prompt(self, user_prompt: str, use_cache: bool = True) -> str:
         """
         Enhance a user prompt to generate more detailed and comprehensive animations.
         
         Args:
             user_prompt: The original user prompt
+            use_cache: Reuse a cached enhancement of an identical prompt; when False a fresh
+                one is generated and replaces it
             
         Returns:
             An enhanced prompt with more detail and guidance
@@ -56,8 +83,36 @@ that will guide the creation of a comprehensive, visually rich, and educational
         if not user_prompt or len(user_prompt.strip()) < 3:
             raise ValueError("User prompt is too short or empty")
         
-        # Build the enhancement request
-        enhancement_request = f"""Please enhance the following prompt for educational animation generation:
+        enhancement_request = self._enhancement_request(user_prompt)
+
+        # Make the API call based on available API
+        if self.api_type == "anthropic":
+            enhance = self._enhance_with_anthropic
+        else:
+            enhance = self._enhance_with_groq
+        
+        # Identical prompts reuse a previously enhanced version, and identical
+        # prompts arriving together share one API call
+        cache = self.cache or get_response_cache()
+        cache_key = self._cache_key(enhancement_request)
+        if not use_cache:
+            enhanced_prompt = enhance(enhancement_request)
+            cache.set(cache_key, enhanced_prompt)
+            return enhanced_prompt
+        return cache.get_or_compute(cache_key, lambda: enhance(enhancement_request))
+    
+    def forget_enhanced_prompt(self, user_prompt: str) -> None:
+        """Drop the cached enhancement of user_prompt, e.g. after the generation it was used for failed"""
+        cache = self.cache or get_response_cache()
+        cache.delete(self._cache_key(self._enhancement_request(user_prompt)))
+    
+    def _cache_key(self, enhancement_request: str) -> str:
+        """Cache key for the enhancement generated from enhancement_request"""
+        return ResponseCache.make_key(self.api_type, "enhance", self.system_prompt, enhancement_request)
+    
+    def _enhancement_request(self, user_prompt: str) -> str:
+        """Build the enhancement request for a user prompt"""
+        return f"""Please enhance the following prompt for educational animation generation:
 
 USER PROMPT: {user_prompt}
 
@@ -72,38 +127,40 @@ educational animation. The enhanced prompt should:
 6. Provide guidance on the appropriate level of detail
 
 ENHANCED PROMPT:"""
-
-        # Make the API call based on available API
-        if self.api_type == "anthropic":
-            return self._enhance_with_anthropic(enhancement_request)
-        else:
-            return self._enhance_with_groq(enhancement_request)
             
-    def _enhance_with_anthropic(self, enhancement_request: str) -> str:
-        """Use Anthropic Claude to enhance the prompt."""
-        headers = {
+    def _headers(self) -> dict:
+        """Build the request headers from the current API key."""
+        if self.api_type == "anthropic":
+            return {
+                "Content-Type": "application/json",
+                "X-API-Key": self.api_key,
+                "anthropic-version": "2023-06-01"
+            }
+        return {
             "Content-Type": "application/json",
-            "X-API-Key": self.api_key,
-            "anthropic-version": "2023-06-01"
-        }
-        
-        data = {
-            "model": "claude-2.0",
-            "prompt": f"\n\nHuman: {self.system_prompt}\n\n{enhancement_request}\n\nAssistant:",
-            "max_tokens_to_sample": 1500,
-            "temperature": 0.7
+            "Authorization": f"Bearer {self.api_key}"
         }
+    
+    def _enhance_with_anthropic(self, enhancement_request: str) -> str:
+        """Use Anthropic Claude to enhance the prompt."""
+        # Continue the open prompt string from the pre-serialized prefix
+        body = (
+            self._body_prefix
+            + json.dumps(f"{enhancement_request}\n\nAssistant:")[1:].encode()
+            + self._body_suffix
+        )
         
-        response = requests.post(
-            "https://api.anthropic.com/v1/complete",
-            headers=headers,
-            json=data
+        response = self.session.post(
+            ANTHROPIC_API_URL,
+            headers=self._headers(),
+            data=body,
+            timeout=API_TIMEOUT
         )
         
         if response.status_code != 200:
             raise Exception(f"API request failed with status {response.status_code}: {response.text}")
         
-        result = response.json()
+        result = json.loads(response.content)
         enhanced_prompt = result.get("completion", "")
         
         if not enhanced_prompt:
@@ -113,31 +170,19 @@ ENHANCED PROMPT:"""
     
     def _enhance_with_groq(self, enhancement_request: str) -> str:
         """Use Groq to enhance the prompt."""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        data = {
-            "messages": [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": enhancement_request}
-            ],
-            "model": "meta-llama/llama-4-maverick-17b-128e-instruct",
-            "max_tokens": 1500,
-            "temperature": 0.7
-        }
+        body = self._body_prefix + json.dumps(enhancement_request).encode() + self._body_suffix
         
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers=headers,
-            json=data
+        response = self.session.post(
+            GROQ_API_URL,
+            headers=self._headers(),
+            data=body,
+            timeout=API_TIMEOUT
         )
         
         if response.status_code != 200:
             raise Exception(f"API request failed with status {response.status_code}: {response.text}")
         
-        result = response.json()
+        result = json.loads(response.content)
         enhanced_prompt = result["choices"][0]["message"]["content"].strip()
         
         if not enhanced_prompt:
@@ -0,0 +1,170 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from .config import RESPONSE_CACHE_PATH
+
+# Default location of the persistent cache, next to the other generated outputs
+_DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "outputs", "cache", "responses.sqlite3"
+)
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses.
+    L1 is an in-process LRU dict for hot prompts, L2 is a SQLite table that survives restarts.
+    """
+    def __init__(self, path: str = _DEFAULT_CACHE_PATH, memory_size: int = 128,
+                 max_entries: int = 10000, ttl: float = 30 * 24 * 3600):
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._l1 = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        # Open the persistent tier; if that fails the cache keeps working in memory only
+        self._db = None
+        try:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+        except sqlite3.Error as e:
+            print(f"Response cache falling back to memory only: {str(e)}")
+            self._db = None
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a cache key from everything that determines the response"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            # L1: in-process LRU
+            value = self._l1.get(key)
+            if value is not None:
+                self._l1.move_to_end(key)
+                return value
+
+            # L2: persistent SQLite tier
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT value FROM cache WHERE key = ? AND ts > ?",
+                    (key, time.time() - self.ttl)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Response cache lookup failed: {str(e)}")
+                return None
+            if row is None:
+                return None
+
+            self._remember(key, row[0])
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store value in both tiers"""
+        with self._lock:
+            self._remember(key, value)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, ts) VALUES (?, ?, ?)",
+                    (key, value, time.time())
+                )
+
+                # Prune expired and excess entries every so often rather than on every write
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._prune()
+            except sqlite3.Error as e:
+                print(f"Response cache write failed: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        """Drop key from both tiers, e.g. when the cached value turned out to be unusable"""
+        with self._lock:
+            self._l1.pop(key, None)
+            if self._db is None:
+                return
+            try:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                print(f"Response cache delete failed: {str(e)}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        """
+        Return the cached value for key, calling compute on a miss.
+        Concurrent misses for the same key share a single compute call instead of each
+        going to the LLM; errors are raised to every waiting caller.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            # The leader stores its result before it leaves the in-flight table, so
+            # check L1 again in case it finished since the lookup above
+            value = self._l1.get(key)
+            if value is not None:
+                return value
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _remember(self, key: str, value: str) -> None:
+        """Insert into the L1 tier, evicting the least recently used entry when full"""
+        self._l1[key] = value
+        self._l1.move_to_end(key)
+        if len(self._l1) > self.memory_size:
+            self._l1.popitem(last=False)
+
+    def _prune(self) -> None:
+        """Drop expired rows and keep only the newest max_entries"""
+        self._db.execute("DELETE FROM cache WHERE ts <= ?", (time.time() - self.ttl,))
+        self._db.execute(
+            "DELETE FROM cache WHERE key NOT IN (SELECT key FROM cache ORDER BY ts DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache"""
+    return ResponseCache(RESPONSE_CACHE_PATH or _DEFAULT_CACHE_PATH)
@@ -1,6 +1,11 @@
 import os
+import sys
+import ast
 import tempfile
+import threading
 import subprocess
+import traceback
+import multiprocessing
 from typing import Optional, List, Dict
 import glob
 import shutil
@@ -8,56 +13,188 @@ import re
 import importlib.util
 import uuid
 import json
+import functools
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on concurrent per-section LLM calls in the modular pipeline
+MAX_SECTION_WORKERS = 4
+
+# Rounds of in-process syntax fixing before the code is handed to Manim
+MAX_SYNTAX_FIX_ROUNDS = 3
+
+# With MANIM_WORKERS set, renders run in that many long-lived worker processes that import
+# Manim once, instead of starting the manim CLI (and importing Manim) for every render.
+# Workers are replaced after MANIM_WORKER_MAX_RENDERS renders so loaded scene modules don't pile up
+MANIM_WORKERS = int(os.getenv("MANIM_WORKERS", "0"))
+MANIM_WORKER_MAX_RENDERS = 50
+
+# Bytes of Manim's stderr kept for error reporting; the errors we look for are at the end
+MANIM_STDERR_TAIL_BYTES = 256 * 1024
+
+# Patterns used by the code fixers, compiled once at import
+_SHOW_CREATION_RE = re.compile(r'ShowCreation\(')
+_CLASS_DEF_RE = re.compile(r'^class\s+\w+.*:')
+_METHOD_DEF_RE = re.compile(r'^\s+def\s+\w+\s*\(self.*\):')
+_SCENE_CLASS_RE = re.compile(r"class\s+(\w+)\s*\(\s*Scene\s*\)\s*:")
+_CONSTRUCT_DEF_RE = re.compile(r"def\s+construct\s*\(\s*self\s*\)\s*:")
+_SYNTAX_ERROR_RE = re.compile(r'SyntaxError: (.+)')
+_LINE_NUMBER_RE = re.compile(r'line (\d+)')
+_INDENT_RE = re.compile(r'^\s+')
+_LEADING_WS_RE = re.compile(r'\s*')
+_MOVE_TO_RE = re.compile(r'\.move_to\(([^)]+)\)')
+_MOVE_TO_CALL_RE = re.compile(r'(\.\s*move_to\s*\()([^)]+)(\))')
+_TEXT_ASSIGN_RE = re.compile(r'(\w+)\s*=\s*Text\(')
+# A direction scaled by 7-19 on either side, which lands outside the visible frame
+_BOUNDS_RE = re.compile(r'(?:UP|DOWN|LEFT|RIGHT)\s*\*\s*([7-9]|1[0-9])|([7-9]|1[0-9])\s*\*\s*(?:UP|DOWN|LEFT|RIGHT)')
+_LAYOUT_MARKER_RE = re.compile(r'title_region|main_region|explanation_region|import numpy as np')
+_SECTION_RE = re.compile(r'\[([\d:]+)\]\s+([^\n]+)(?:\n(.*?))?(?=\n\[[\d:]+\]|\Z)', re.DOTALL)
+_NON_IDENTIFIER_RE = re.compile(r'[^a-zA-Z0-9_]')
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+# Lookaheads so nested calls like FadeOut(FadeOut(x)) are all found
+_FADE_OUT_NAME_RE = re.compile(r'FadeOut\((?=(\w+)\))')
+_TRANSFORM_NAME_RE = re.compile(r'Transform\((?=(\w+))')
+
+# Curly quotes and en/em dashes mapped to ASCII in one translate pass
+_QUOTE_TABLE = str.maketrans({
+    '\u201c': '"', '\u201d': '"',
+    '\u2018': "'", '\u2019': "'",
+    '\u2013': '-', '\u2014': '-',
+})
+
+# Number of fixed scenes remembered per SceneGenerator
+FIXED_CODE_CACHE_SIZE = 128
+
+# Names whose presence means the scene already lays itself out in regions
+_SPATIAL_REGION_NAMES = frozenset(('title_region', 'main_region', 'explanation_region'))
+
+# Indentation of a line in _apply_aggressive_fixes for each position in the scene
+_STATE_INDENT = {'top': '', 'class': '    ', 'method': '        '}
+
+# Lines that are nothing but a markdown fence
+_FENCE_LINES = frozenset(('```', '```python'))
+
+def _indent(line: str) -> int:
+    """Width of the leading whitespace of line, without building a stripped copy."""
+    return _LEADING_WS_RE.match(line).end()
+
+@functools.lru_cache(maxsize=None)
+def _manim_executable() -> str:
+    """
+    Absolute path of the manim CLI, looked up on PATH once.
+    Popen can only take its posix_spawn fast path when given a path rather than a bare name.
+    """
+    return shutil.which("manim") or "manim"
+
+def _init_render_worker() -> None:
+    """Render worker initializer: discard stdout like the CLI runs do, and import Manim once."""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    import manim  # noqa: F401
+
+
+def _render_in_worker(args: List[str]) -> tuple:
+    """
+    Run the manim CLI in-process inside a render worker.
+    Returns the exit code and the tail of everything written to stderr, like a CLI run would.
+    """
+    from manim.cli.render.commands import render
+    
+    with tempfile.TemporaryFile() as capture:
+        # Send fd 2 to the capture file so Manim's error console and tracebacks are collected
+        sys.stderr.flush()
+        saved_stderr = os.dup(2)
+        os.dup2(capture.fileno(), 2)
+        try:
+            render.main(args, prog_name="manim", standalone_mode=False)
+            returncode = 0
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+        finally:
+            sys.stderr.flush()
+            os.dup2(saved_stderr, 2)
+            os.close(saved_stderr)
+        
+        # Keep only the tail, as _run_manim does for the CLI
+        size = capture.seek(0, os.SEEK_END)
+        capture.seek(max(0, size - MANIM_STDERR_TAIL_BYTES))
+        stderr = capture.read().decode('utf-8', 'replace')
+    return returncode, stderr.replace('\r\n', '\n').replace('\r', '\n')
+
 
 class SceneGenerator:
     def __init__(self):
         self.quality = "medium_quality"
         self.preview = False
         self._debug_mode = False  # Debug mode flag
-        # Check if example animations are available
-        self.has_examples = os.path.exists(os.path.join(os.path.dirname(__file__), "example_animations.py"))
+        # Check if example animations are available, resolving the path once
+        self._example_file_path = os.path.join(os.path.dirname(__file__), "example_animations.py")
+        self.has_examples = os.path.exists(self._example_file_path)
+        # The fixes are a pure function of the code and class name, so repeated inputs are memoized
+        self._fixed_code_cache = functools.lru_cache(maxsize=FIXED_CODE_CACHE_SIZE)(self._fix_manim_code_uncached)
+        # Render worker pool, started on first use when MANIM_WORKERS is set
+        self._render_workers = None
+        self._render_workers_lock = threading.Lock()
         
     def _fix_manim_code(self, code: str, scene_class_name: str = None) -> str:
         """
         Fix common issues in generated Manim code to make it compatible with the installed version.
         Also fixes the class name if it doesn't match the expected name.
         """
+        return self._fixed_code_cache(code, scene_class_name)
+    
+    def _fix_manim_code_uncached(self, code: str, scene_class_name: str = None) -> str:
+        """Apply the _fix_manim_code fixes without the memo."""
         # Remove markdown artifacts (like triple backticks)
         fixed_code = self._remove_markdown_artifacts(code)
         
-        # Replace ShowCreation (old name) with Create (new name)
-        fixed_code = re.sub(r'ShowCreation\(', 'Create(', fixed_code)
+        # Replace ShowCreation (old name) with Create (new name), skipping the regex when absent
+        if 'ShowCreation(' in fixed_code:
+            fixed_code = _SHOW_CREATION_RE.sub('Create(', fixed_code)
         
         # Fix 'self' references outside of class methods (common LLM error)
-        # This pattern looks for 'self.' at the module level (not indented inside a method)
-        lines = fixed_code.split('\n')
-        in_class = False
-        in_method = False
-        fixed_lines = []
+        # This pattern looks for 'self.' at the module level (not indented inside a method).
+        # Without any 'self.' there is nothing to fix, so skip splitting the code
+        if 'self.' in fixed_code:
+            lines = fixed_code.split('\n')
+            in_class = False
+            in_method = False
+            fixed_lines = []
+            
+            # Bind the matchers once instead of looking them up on every line
+            match_class = _CLASS_DEF_RE.match
+            match_method = _METHOD_DEF_RE.match
+            append = fixed_lines.append
+            
+            for line in lines:
+                # Cheap substring checks rule out most lines before any regex runs:
+                # a class line must start with 'class' and a method line must contain 'def'
+                # Track if we're inside a class definition
+                if line.startswith('class') and match_class(line):
+                    in_class = True
+                    in_method = False
+                # Track if we're inside a method definition
+                elif in_class and 'def' in line and match_method(line):
+                    in_method = True
+                # If line is not indented (and not blank), we're back at module level
+                elif line and line[0] not in ' \t' and not line.isspace():
+                    in_class = False
+                    in_method = False
+                
+                # Fix self references at module level
+                if not in_method and 'self.' in line:
+                    # Remove the line or comment it out
+                    line = '# ' + line + ' # Removed invalid self reference'
+                
+                append(line)
+            
+            fixed_code = '\n'.join(fixed_lines)
         
-        for line in lines:
-            # Track if we're inside a class definition
-            if re.match(r'^class\s+\w+.*:', line):
-                in_class = True
-                in_method = False
-            # Track if we're inside a method definition
-            elif in_class and re.match(r'^\s+def\s+\w+\s*\(self.*\):', line):
-                in_method = True
-            # If line is not indented, we're back at module level
-            elif line.strip() and not line.startswith(' ') and not line.startswith('\t'):
-                in_class = False
-                in_method = False
-            
-            # Fix self references at module level
-            if not in_method and 'self.' in line:
-                # Remove the line or comment it out
-                line = '# ' + line + ' # Removed invalid self reference'
-            
-            fixed_lines.append(line)
-        
-        fixed_code = '\n'.join(fixed_lines)
-        
-        # Fix other common issues
+        # Fix other common issues on the whole string, without splitting it again
         fixed_code = self._fix_common_syntax_errors(fixed_code)
         
         # Improve animation quality and fix text overlay issues
@@ -66,17 +203,17 @@ class SceneGenerator:
         # If scene_class_name is provided, ensure the class is named correctly
         if scene_class_name:
             # Check if we need to rename a class
-            any_scene_pattern = r"class\s+(\w+)\s*\(\s*Scene\s*\)\s*:"
-            any_class_match = re.search(any_scene_pattern, fixed_code)
+            any_class_match = _SCENE_CLASS_RE.search(fixed_code)
             
             if any_class_match:
                 found_class_name = any_class_match.group(1)
                 if found_class_name != scene_class_name:
                     # Rename the class
                     print(f"Renaming class from {found_class_name} to {scene_class_name}")
-                    fixed_code = re.sub(
-                        rf"class\s+{found_class_name}\s*\(\s*Scene\s*\)\s*:", 
-                        f"class {scene_class_name}(Scene):", 
+                    # Reuse the compiled scene-class pattern, renaming only matches of the found name
+                    renamed = f"class {scene_class_name}(Scene):"
+                    fixed_code = _SCENE_CLASS_RE.sub(
+                        lambda m: renamed if m.group(1) == found_class_name else m.group(0),
                         fixed_code
                     )
         
@@ -86,18 +223,35 @@ class SceneGenerator:
         """
         Remove common markdown artifacts from generated code.
         """
-        # Remove triple backticks at the beginning and end
-        code = re.sub(r'^```python\s*\n', '', code)
-        code = re.sub(r'^```\s*\n', '', code)
-        code = re.sub(r'\n```\s*$', '', code)
-        code = re.sub(r'```\s*$', '', code)
+        # Every artifact involves a fence, so code without one is returned as is
+        if '```' not in code:
+            return code
+        
+        # Remove triple backticks at the beginning (up to the last newline of the
+        # whitespace that follows them) and at the end, using slices instead of regexes
+        for fence in ('```python', '```'):
+            if code.startswith(fence):
+                rest = code[len(fence):]
+                newline = rest.rfind('\n', 0, _indent(rest))
+                if newline != -1:
+                    code = rest[newline + 1:]
+        stripped = code.rstrip()
+        if stripped.endswith('\n```'):
+            code = stripped[:-4]
+            stripped = code.rstrip()
+        if stripped.endswith('```'):
+            code = stripped[:-3]
         
         # Remove any standalone backticks that might be in the code
         lines = code.split('\n')
         clean_lines = []
         for line in lines:
+            # Most lines have no backticks and pass through untouched
+            if '```' not in line:
+                clean_lines.append(line)
+                continue
             # Skip lines that are just backticks
-            if line.strip() in ['```', '```python']:
+            if line.strip() in _FENCE_LINES:
                 continue
             # Remove backticks from the end of lines
             if line.strip().endswith('```'):
@@ -113,27 +267,26 @@ class SceneGenerator:
         """
         Fix common syntax errors in generated code.
         """
-        # Replace curly quotes with straight quotes
-        code = code.replace('"', '"').replace('"', '"')
-        code = code.replace(''', "'").replace(''', "'")
+        # Fix common indentation issues: mixed tabs and spaces, detected on the whole string
+        if '\t' in code and (code.startswith(' ') or '\n ' in code):
+            # Convert tabs to spaces for consistency
+            code = code.replace('\t', '    ')
         
-        # Fix common indentation issues
-        lines = code.split('\n')
-        # Check for mixed tabs and spaces
-        has_tabs = any('\t' in line for line in lines)
-        has_spaces = any(line.startswith(' ') for line in lines)
+        return self._normalize_characters(code)
+    
+    def _normalize_characters(self, code: str) -> str:
+        """
+        Replace curly quotes and strip non-ASCII characters.
+        """
+        # Plain ASCII code has neither, which is the usual case
+        if code.isascii():
+            return code
         
-        if has_tabs and has_spaces:
-            # Convert tabs to spaces for consistency
-            fixed_lines = []
-            for line in lines:
-                fixed_lines.append(line.replace('\t', '    '))
-            code = '\n'.join(fixed_lines)
-            
-        # Remove any non-ASCII characters that could cause issues
-        code = ''.join(c if ord(c) < 128 else ' ' for c in code)
+        # Replace curly quotes with straight quotes
+        code = code.translate(_QUOTE_TABLE)
         
-        return code
+        # Remove any non-ASCII characters that could cause issues, one space per character
+        return _NON_ASCII_RE.sub(' ', code)
         
     def create_video(
         self,
@@ -152,6 +305,7 @@ class SceneGenerator:
         Returns:
             The generation_id of the video, which can be used to access it via the API
         """
+        scene_fd = None
         try:
             # Make sure outputs directory exists
             os.makedirs("outputs", exist_ok=True)
@@ -159,10 +313,13 @@ class SceneGenerator:
             # Fix any known issues in the code
             fixed_code = self._fix_manim_code(manim_code)
             
-            # Create a temporary Python file with the Manim code
+            # Catch syntax errors here rather than by starting Manim
+            fixed_code = self._fix_syntax_before_render(fixed_code, generation_id)
+            
+            # Create a temporary Python file with the Manim code, kept open for rewrites on retry
             temp_file_path = os.path.join(output_dir, f"scene_{generation_id}.py")
-            with open(temp_file_path, "w") as f:
-                f.write(fixed_code)
+            scene_fd = self._open_scene_file(temp_file_path)
+            self._write_scene_file(scene_fd, fixed_code)
             
             # Print generated code for debugging
             print(f"\nGenerated Manim code for scene_{generation_id}.py:")
@@ -173,19 +330,10 @@ class SceneGenerator:
             # If we have examples available, copy the example_animations.py to the output dir
             # so it can be referenced by the scene
             if self.has_examples:
-                example_file = os.path.join(os.path.dirname(__file__), "example_animations.py")
-                shutil.copy(example_file, output_dir)
+                self._link_example_file(output_dir)
             
             # Run Manim to generate the video
-            command = [
-                "manim",
-                "-qm",  # medium quality
-                "--format=mp4",
-                "--output_file", generation_id,
-                "--media_dir", "outputs",
-                temp_file_path,
-                "CustomAnimation"
-            ]
+            command = self._manim_command(temp_file_path, generation_id)
             
             # Print the command for debugging
             print(f"Running command: {' '.join(command)}")
@@ -193,21 +341,14 @@ class SceneGenerator:
             # First attempt to run Manim
             try:
                 # Run Manim
-                process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                stdout, stderr = process.communicate()
+                returncode, stderr = self._run_manim(command)
                 
-                print(f"Manim stdout: {stdout}")
                 if stderr:
                     print(f"Manim stderr: {stderr}")
                 
-                if process.returncode != 0:
+                if returncode != 0:
                     # Try to extract syntax error information
-                    syntax_error_match = re.search(r'SyntaxError: (.+)', stderr)
+                    syntax_error_match = _SYNTAX_ERROR_RE.search(stderr)
                     syntax_error_info = ""
                     if syntax_error_match:
                         syntax_error_info = syntax_error_match.group(1)
@@ -218,7 +359,7 @@ class SceneGenerator:
                         print("Fixing 'self' reference errors in the code...")
                         fixed_lines = []
                         for line in fixed_code.split('\n'):
-                            if 'self.' in line and not re.match(r'^\s+', line):
+                            if 'self.' in line and not _INDENT_RE.match(line):
                                 # Skip lines with self references at module level completely
                                 continue
                             fixed_lines.append(line)
@@ -231,30 +372,21 @@ class SceneGenerator:
                         fixed_code = self._apply_aggressive_fixes(fixed_code, stderr)
                         
                     # Write the fixed code
-                    with open(temp_file_path, "w") as f:
-                        f.write(fixed_code)
+                    self._write_scene_file(scene_fd, fixed_code)
                     
                     # Try running Manim again
                     print("Trying again with fixed code...")
-                    process = subprocess.Popen(
-                        command,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True
-                    )
-                    stdout, stderr = process.communicate()
+                    returncode, stderr = self._run_manim(command)
                     
-                    print(f"Second attempt Manim stdout: {stdout}")
                     if stderr:
                         print(f"Second attempt Manim stderr: {stderr}")
                     
-                    if process.returncode != 0:
+                    if returncode != 0:
                         # If we still have issues, raise an error
                         if "SyntaxError" in stderr:
                             # Save the problematic code for debugging
                             debug_file = f"debug_scene_{generation_id}.py"
-                            with open(debug_file, "w") as f:
-                                f.write(fixed_code)
+                            Path(debug_file).write_bytes(fixed_code.encode("utf-8"))
                             print(f"Saved problematic code to {debug_file} for inspection")
                             raise Exception(f"Manim rendering failed with syntax errors: {stderr}")
                         else:
@@ -269,11 +401,138 @@ class SceneGenerator:
             
         except Exception as e:
             raise Exception(f"Error generating video: {str(e)}")
+        finally:
+            if scene_fd is not None:
+                os.close(scene_fd)
+    
+    def _fix_syntax_before_render(self, code: str, generation_id: str) -> str:
+        """
+        Parse the code in-process and apply the aggressive fixes while it has syntax errors,
+        so a syntax error doesn't cost a whole Manim start-up to discover.
+        """
+        for _ in range(MAX_SYNTAX_FIX_ROUNDS):
+            try:
+                ast.parse(code)
+                return code
+            except SyntaxError as e:
+                print(f"Detected syntax error before rendering: line {e.lineno}: {e.msg}")
+                fixed_code = self._apply_aggressive_fixes(code, f"line {e.lineno}: {e.msg}")
+            
+            # Stop once the fixes no longer change anything
+            if fixed_code == code:
+                break
+            code = fixed_code
+        
+        # Don't render a gutted scene; fail with the syntax error instead
+        try:
+            ast.parse(code)
+        except SyntaxError as e:
+            # Save the problematic code for debugging
+            debug_file = f"debug_scene_{generation_id}.py"
+            Path(debug_file).write_bytes(code.encode("utf-8"))
+            print(f"Saved problematic code to {debug_file} for inspection")
+            raise Exception(f"Generated code has syntax errors: line {e.lineno}: {e.msg}")
+        return code
+    
+    def _open_scene_file(self, path: str) -> int:
+        """Open a scene file once for writing; retries rewrite it in place through the descriptor."""
+        return os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    
+    def _write_scene_file(self, fd: int, code: str) -> None:
+        """Replace the contents of an open scene file."""
+        data = memoryview(code.encode("utf-8"))
+        os.ftruncate(fd, 0)
+        os.lseek(fd, 0, os.SEEK_SET)
+        while data:
+            data = data[os.write(fd, data):]
+    
+    def _manim_command(self, scene_file: str, generation_id: str) -> List[str]:
+        """Build the Manim command that renders the CustomAnimation scene in scene_file."""
+        return [
+            _manim_executable(),
+            "-qm",  # medium quality
+            "--format=mp4",
+            "--output_file", generation_id,
+            "--media_dir", "outputs",
+            scene_file,
+            "CustomAnimation"
+        ]
+    
+    def _link_example_file(self, output_dir: str) -> None:
+        """
+        Make example_animations.py available in output_dir.
+        A hardlink is a metadata-only operation; across filesystems use a symlink, and copy
+        only when neither is possible.
+        """
+        dest = os.path.join(output_dir, "example_animations.py")
+        if os.path.lexists(dest):
+            return
+        try:
+            os.link(self._example_file_path, dest)
+        except OSError:
+            try:
+                os.symlink(self._example_file_path, dest)
+            except OSError:
+                shutil.copyfile(self._example_file_path, dest)
+    
+    def _run_manim(self, command: List[str]) -> tuple:
+        """
+        Run Manim and return its exit code and the tail of its stderr.
+        Stdout (progress output) is discarded and stderr is read as raw bytes, keeping only
+        the last MANIM_STDERR_TAIL_BYTES, so memory stays bounded however verbose the render is
+        and only that tail is ever decoded.
+        """
+        render_workers = self._get_render_workers()
+        if render_workers is not None:
+            return render_workers.apply(_render_in_worker, (command[1:],))
+        
+        # The server's own descriptors are non-inheritable, so close_fds=False only drops the
+        # per-descriptor close loop and lets Popen use posix_spawn instead of fork+exec
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            close_fds=False
+        )
+        # Only stderr is piped, so reading it to EOF here can't deadlock
+        stderr_tail = bytearray()
+        for chunk in iter(lambda: process.stderr.read(65536), b''):
+            stderr_tail += chunk
+            if len(stderr_tail) > MANIM_STDERR_TAIL_BYTES:
+                del stderr_tail[:-MANIM_STDERR_TAIL_BYTES]
+        process.stderr.close()
+        returncode = process.wait()
+        
+        # Decode with the same newline handling text mode had
+        stderr = stderr_tail.decode('utf-8', 'replace')
+        return returncode, stderr.replace('\r\n', '\n').replace('\r', '\n')
+    
+    def _get_render_workers(self):
+        """Return the render worker pool, starting it on first use, or None when disabled."""
+        if MANIM_WORKERS <= 0:
+            return None
+        with self._render_workers_lock:
+            if self._render_workers is None:
+                # Spawn rather than fork: the server process is multithreaded
+                self._render_workers = multiprocessing.get_context("spawn").Pool(
+                    processes=MANIM_WORKERS,
+                    initializer=_init_render_worker,
+                    maxtasksperchild=MANIM_WORKER_MAX_RENDERS
+                )
+            return self._render_workers
+    
+    def close(self) -> None:
+        """Stop the render worker pool if one was started."""
+        with self._render_workers_lock:
+            if self._render_workers is not None:
+                self._render_workers.terminate()
+                self._render_workers.join()
+                self._render_workers = None
     
     def _apply_aggressive_fixes(self, code: str, error_msg: str) -> str:
         """Apply more aggressive fixes to the code based on the error message."""
         # First, extract line number if available
-        line_num_match = re.search(r'line (\d+)', error_msg)
+        line_num_match = _LINE_NUMBER_RE.search(error_msg)
         problem_line_num = int(line_num_match.group(1)) if line_num_match else None
         
         # Try to extract just the Python code part
@@ -284,8 +543,7 @@ class SceneGenerator:
         # Normalize indentation
         lines = code.split('\n')
         fixed_lines = []
-        class_found = False
-        method_found = False
+        state = 'top'
         
         # If we know the problem line, print it for debugging
         if problem_line_num is not None and problem_line_num <= len(lines):
@@ -297,44 +555,40 @@ class SceneGenerator:
                 print("Found backticks in problem line, removing them")
                 lines[problem_line_num - 1] = problem_line.replace("```", "")
         
-        for i, line in enumerate(lines):
+        # Bind append once for the loop
+        append = fixed_lines.append
+        for line in lines:
             # Extract clean line (no whitespace)
             clean_line = line.strip()
             
             # Skip blank lines
             if not clean_line:
-                fixed_lines.append('')
+                append('')
                 continue
             
             # Skip lines that appear to be markdown artifacts
-            if clean_line in ['```', '```python']:
+            if clean_line in _FENCE_LINES:
                 continue
                 
             # Handle imports and top-level statements
-            if clean_line.startswith('from ') or clean_line.startswith('import '):
-                fixed_lines.append(clean_line)
+            if clean_line.startswith(('from ', 'import ')):
+                append(clean_line)
                 continue
                 
             # Handle class definition
             if clean_line.startswith('class CustomAnimation'):
-                class_found = True
-                method_found = False
-                fixed_lines.append(clean_line)
+                state = 'class'
+                append(clean_line)
                 continue
                 
             # Handle method definition
-            if class_found and clean_line.startswith('def construct'):
-                method_found = True
-                fixed_lines.append('    ' + clean_line)  # Indent method
+            if state != 'top' and clean_line.startswith('def construct'):
+                state = 'method'
+                append('    ' + clean_line)  # Indent method
                 continue
                 
-            # Handle method body
-            if method_found:
-                fixed_lines.append('        ' + clean_line)  # Double indent
-            elif class_found:
-                fixed_lines.append('    ' + clean_line)  # Single indent
-            else:
-                fixed_lines.append(clean_line)  # No indent
+            # Method body, class body or top level, indented for the current state
+            append(_STATE_INDENT[state] + clean_line)
         
         return '\n'.join(fixed_lines)
     
@@ -355,11 +609,12 @@ class SceneGenerator:
         # Check if we have multiple text objects without removal
         lines = code.split('\n')
         text_creations = []
-        text_removals = []
+        removed_names = set()
         text_names = set()
         section_comments = []
-        text_positions = {}  # Track text positioning
         move_to_calls = []  # Track all move_to calls
+        move_to_lines = []  # Lines the boundary rewrite needs to visit
+        need_boundary_checks = False
         
         # First pass - collect information
         for i, line in enumerate(lines):
@@ -369,55 +624,75 @@ class SceneGenerator:
             if stripped.startswith('#') and len(stripped) > 2:
                 section_comments.append((i, stripped))
             
-            # Track all move_to calls to check for boundary issues
-            move_to_match = re.search(r'\.move_to\(([^)]+)\)', stripped)
+            # Track all move_to calls to check for boundary issues; only lines naming
+            # move_to can match either move_to pattern
+            move_to_match = None
+            if 'move_to' in stripped:
+                move_to_lines.append(i)
+                move_to_match = _MOVE_TO_RE.search(stripped)
             if move_to_match:
                 position = move_to_match.group(1)
                 move_to_calls.append((i, position))
+                
+                # Check for positions that might be out of bounds
+                if not need_boundary_checks and _BOUNDS_RE.search(position):
+                    need_boundary_checks = True
             
             # Track text object creations
-            text_creation_match = re.search(r'(\w+)\s*=\s*Text\(', stripped)
+            text_creation_match = _TEXT_ASSIGN_RE.search(stripped)
             if text_creation_match:
                 text_name = text_creation_match.group(1)
                 text_names.add(text_name)
                 text_creations.append((i, text_name))
-                
-                # Check if this text has positioning information
-                if move_to_match:
-                    text_positions[text_name] = move_to_match.group(1)
             
-            # Track text object removals (FadeOut, Transform, etc.)
-            for name in text_names:
-                if f"FadeOut({name})" in stripped or f"Transform({name}" in stripped:
-                    text_removals.append((i, name))
+            # Track text object removals (FadeOut, Transform, etc.) of texts created so far,
+            # pulling the names out of the calls instead of testing every known name
+            if 'FadeOut(' in stripped:
+                for match in _FADE_OUT_NAME_RE.finditer(stripped):
+                    if match.group(1) in text_names:
+                        removed_names.add(match.group(1))
+            if 'Transform(' in stripped:
+                for match in _TRANSFORM_NAME_RE.finditer(stripped):
+                    # Transform(name matches as a prefix, so any known name the argument starts with counts
+                    argument = match.group(1)
+                    for end in range(1, len(argument) + 1):
+                        if argument[:end] in text_names:
+                            removed_names.add(argument[:end])
+        
+        # Without text objects or out-of-bounds positions none of the fixes below apply
+        if not text_creations and not need_boundary_checks:
+            return code
+        
+        # Lines to add before each original line index, merged in one pass at the end.
+        # None of the added lines match the searches below, so those search the original lines
+        insertions = {}
         
         # Fix missing FadeOut for text objects
-        fixed_lines = lines.copy()
         created_but_not_removed = []
         
         # Find text objects that were created but never removed
         for i, text_name in text_creations:
             # Check if this text was ever removed
-            if not any(name == text_name for _, name in text_removals):
+            if text_name not in removed_names:
                 created_but_not_removed.append((i, text_name))
         
         # Add FadeOut for text objects that weren't removed
         if created_but_not_removed:
-            # Find the last wait call in the method to insert before it
+            # Find the last wait call in the method to insert before it, searching the
+            # unsplit code and counting newlines to get its line index
             last_wait_index = -1
-            for i, line in enumerate(reversed(lines)):
-                if "self.wait" in line.strip():
-                    last_wait_index = len(lines) - i - 1
-                    break
+            wait_pos = code.rfind("self.wait")
+            if wait_pos != -1:
+                last_wait_index = code.count('\n', 0, wait_pos)
             
             # If no wait call found, find the end of the construct method
             if last_wait_index == -1:
                 for i, line in enumerate(lines):
                     if line.strip() == "def construct(self):":
                         # Find the end of the method by indentation
-                        method_indent = len(line) - len(line.lstrip())
+                        method_indent = _indent(line)
                         for j in range(i+1, len(lines)):
-                            if lines[j].strip() and len(lines[j]) - len(lines[j].lstrip()) <= method_indent:
+                            if lines[j].strip() and _indent(lines[j]) <= method_indent:
                                 last_wait_index = j - 1
                                 break
                         if last_wait_index == -1:  # If we couldn't find the end, use the last line
@@ -429,64 +704,29 @@ class SceneGenerator:
                 # Create a list of text objects to fade out
                 text_objects = [name for _, name in created_but_not_removed]
                 if text_objects:
-                    # Add a comment explaining the fix
-                    fixed_lines.insert(last_wait_index, "        # Cleaning up text objects to avoid cluttering")
-                    
                     # For multiple objects, use a group
                     if len(text_objects) > 1:
                         fade_out_line = f"        self.play(FadeOut(VGroup({', '.join(text_objects)})))"
                     else:
                         fade_out_line = f"        self.play(FadeOut({text_objects[0]}))"
                     
-                    fixed_lines.insert(last_wait_index + 1, fade_out_line)
-        
-        # Check for missing spatial organization and add comments to help
-        has_spatial_org = False
-        need_boundary_checks = False
+                    # Add a comment explaining the fix and the FadeOut
+                    insertions[last_wait_index] = [
+                        "        # Cleaning up text objects to avoid cluttering",
+                        fade_out_line
+                    ]
         
-        # Check if any text position might be out of bounds
-        for text_name, position in text_positions.items():
-            # Check for large position values that might be out of bounds
-            if ('*' in position and (
-                '10' in position or '9' in position or '8' in position or '7' in position)
-            ) or (
-                position.strip().startswith('UP *') or position.strip().startswith('DOWN *') or
-                position.strip().startswith('LEFT *') or position.strip().startswith('RIGHT *')
-            ):
-                need_boundary_checks = True
-                break
-        
-        # Check all move_to calls for potential boundary issues
-        for _, position in move_to_calls:
-            # Check for large values in any move_to call
-            if ('*' in position and (
-                '10' in position or '9' in position or '8' in position or '7' in position)) or re.search(r'[0-9]\s*\*\s*(UP|DOWN|LEFT|RIGHT)', position):
-                need_boundary_checks = True
-                break
-        
-        for line in fixed_lines:
-            if "title_region" in line or "main_region" in line or "explanation_region" in line:
-                has_spatial_org = True
-                break
-            
-            # Also check for common patterns that suggest positions out of bounds
-            if re.search(r'(UP|DOWN|LEFT|RIGHT)\s*\*\s*[7-9]', line) or re.search(r'(UP|DOWN|LEFT|RIGHT)\s*\*\s*1[0-9]', line):
-                need_boundary_checks = True
-        
-        # Always apply boundary checking for the test cases
-        # Force boundary checking to be true for this test
-        need_boundary_checks = True
-                
         # Add spatial organization and boundary checking
         if need_boundary_checks:
+            # Find the spatial-region names and the numpy import in one scan of the code; the
+            # boundary helpers inserted below contain neither, so this holds for both checks
+            markers = set(_LAYOUT_MARKER_RE.findall(code))
+            has_spatial_org = not markers.isdisjoint(_SPATIAL_REGION_NAMES)
+            
             if not has_spatial_org:
                 # Find the start of the construct method
-                for i, line in enumerate(fixed_lines):
+                for i, line in enumerate(lines):
                     if line.strip() == "def construct(self):":
-                        # Add boundary checking sections
-                        fixed_lines.insert(i + 1, "        # Define safe boundaries for text placement")
-                        fixed_lines.insert(i + 2, "        boundary_threshold = 6  # Max distance from origin to stay in bounds")
-                        
                         # Add boundary checking function
                         boundary_check_func = """
         def ensure_within_boundaries(position, threshold=boundary_threshold):
@@ -498,36 +738,35 @@ class SceneGenerator:
                     return position * (threshold / magnitude)
             return position
 """
-                        fixed_lines.insert(i + 3, boundary_check_func)
+                        # Add the boundary checking sections and function right after the method line
+                        insertions[i + 1] = [
+                            "        # Define safe boundaries for text placement",
+                            "        boundary_threshold = 6  # Max distance from origin to stay in bounds",
+                            boundary_check_func
+                        ] + insertions.get(i + 1, [])
                         break
         
         # Add boundary checking for text objects and positions
         if need_boundary_checks:
             # Check if we need to add boundary checking imports
-            has_numpy_import = False
-            for i, line in enumerate(fixed_lines):
-                if "import numpy as np" in line:
-                    has_numpy_import = True
-                    break
-            
-            if not has_numpy_import:
+            if "import numpy as np" not in markers:
                 # Find the right place to add numpy import
-                for i, line in enumerate(fixed_lines):
-                    if line.strip().startswith("from manim import") or line.strip().startswith("import"):
-                        fixed_lines.insert(i + 1, "import numpy as np")
+                for i, line in enumerate(lines):
+                    if line.strip().startswith(("from manim import", "import")):
+                        insertions[i + 1] = ["import numpy as np"] + insertions.get(i + 1, [])
                         break
             
-            # Apply boundary checks to all move_to calls in the code
-            for i in range(len(fixed_lines)):
-                line = fixed_lines[i]
+            # Apply boundary checks to all move_to calls in the code, visiting only the lines
+            # the first pass saw them on (the lines have not changed since)
+            for i in move_to_lines:
+                line = lines[i]
                 
                 # Skip if already using ensure_within_boundaries
                 if "ensure_within_boundaries" in line:
                     continue
                 
                 # Find move_to calls using a more reliable pattern
-                move_to_pattern = r'(\.\s*move_to\s*\()([^)]+)(\))'
-                move_to_match = re.search(move_to_pattern, line)
+                move_to_match = _MOVE_TO_CALL_RE.search(line)
                 
                 if move_to_match:
                     # Extract the three parts: prefix, position, suffix
@@ -543,28 +782,28 @@ class SceneGenerator:
                     replacement = f"{prefix}ensure_within_boundaries({position}){suffix}"
                     
                     # Replace this specific instance in the line
-                    fixed_lines[i] = line.replace(move_to_match.group(0), replacement)
+                    lines[i] = line.replace(move_to_match.group(0), replacement)
                     
                     if self._debug_mode:
                         print(f"DEBUG: Replaced with: {replacement}")
-                        print(f"DEBUG: New line: {fixed_lines[i].strip()}")
+                        print(f"DEBUG: New line: {lines[i].strip()}")
         
         # Check if we need to add text replacement example
-        has_text_transform = any("Transform(" in line for line in fixed_lines)
+        has_text_transform = "Transform(" in code
         if not has_text_transform and len(text_creations) > 2:
             # Add a comment with an example of text transformation technique
-            for i, line in enumerate(fixed_lines):
+            for i, line in enumerate(lines):
                 if "Text(" in line:
-                    indent = len(line) - len(line.lstrip())
+                    indent = _indent(line)
                     # Add the comment after this text creation
                     example = " " * indent + "# Example: To update this text use self.play(Transform(text1, text2))"
-                    fixed_lines.insert(i + 1, example)
+                    insertions[i + 1] = [example] + insertions.get(i + 1, [])
                     break
         
         # If we have examples available and there are still issues, add import for our example patterns
         if self.has_examples and (len(created_but_not_removed) > 2 or (len(text_creations) > 3 and not has_text_transform)):
             # Add a comment with references to example patterns
-            for i, line in enumerate(fixed_lines):
+            for i, line in enumerate(lines):
                 if line.strip().startswith('from manim import'):
                     # Find the best example class to reference based on the issues
                     if len(created_but_not_removed) > 2:
@@ -575,9 +814,19 @@ class SceneGenerator:
                         comment = "# Refer to the ProgressiveSteps example for how to show sequential information"
                     
                     # Add comment and optional import
-                    fixed_lines.insert(i + 1, comment)
+                    insertions[i + 1] = [comment] + insertions.get(i + 1, [])
                     break
-                    
+        
+        # Merge the added lines in, each after the ones queued before it at the same index
+        fixed_lines = []
+        extend = fixed_lines.extend
+        append = fixed_lines.append
+        for i, line in enumerate(lines):
+            if i in insertions:
+                extend(insertions[i])
+            append(line)
+        extend(insertions.get(len(lines), ()))
+        
         return '\n'.join(fixed_lines)
 
     def _generate_scene_prompt(self, section_title: str, section_content: str, scene_class_name: str) -> str:
@@ -617,7 +866,8 @@ EXTREMELY IMPORTANT:
         narration_script: str,
         output_dir: str,
         generation_id: str,
-        llm_handler
+        llm_handler,
+        use_cache: bool = True
     ) -> str:
         """
         Creates a video by breaking down the task into multiple scenes.
@@ -628,10 +878,12 @@ EXTREMELY IMPORTANT:
             output_dir: Directory to store temporary files
             generation_id: Unique identifier for this generation
             llm_handler: The LLM handler to use for code generation
+            use_cache: Whether section code may come from the handler's response cache
             
         Returns:
             The generation_id of the video, which can be used to access it via the API
         """
+        scene_fd = None
         try:
             # Make sure outputs directory exists
             os.makedirs("outputs", exist_ok=True)
@@ -639,52 +891,26 @@ EXTREMELY IMPORTANT:
             # Parse narration script to identify sections
             sections = self._parse_narration_sections(narration_script)
             
-            # Generate a separate scene class for each section
-            scene_classes = []
-            scene_codes = []
-            
-            for i, section in enumerate(sections):
-                # Generate scene code for this section only
-                scene_class_name = f"Scene{i+1}_{self._sanitize_name(section['title'])}"
-                scene_prompt = self._generate_scene_prompt(
-                    section_title=section['title'],
-                    section_content=section['content'],
-                    scene_class_name=scene_class_name
-                )
-                
-                # Pass a smaller, focused prompt to the LLM
-                scene_code = llm_handler.generate_manim_code(scene_prompt)
-                
-                # Validate the code has the required elements before fixing
-                if not self._validate_scene_code(scene_code, scene_class_name):
-                    print(f"Generated code for {scene_class_name} does not have required elements")
-                    print(f"Raw code: {scene_code[:200]}...")
-                    # Try regenerating the code with a more explicit prompt
-                    enhanced_prompt = self._generate_enhanced_scene_prompt(
-                        section_title=section['title'],
-                        section_content=section['content'],
-                        scene_class_name=scene_class_name
-                    )
-                    print(f"Trying again with enhanced prompt for {scene_class_name}")
-                    scene_code = llm_handler.generate_manim_code(enhanced_prompt)
-                    
-                    # Check if we now have valid code
-                    if not self._validate_scene_code(scene_code, scene_class_name):
-                        print(f"Second attempt failed for {scene_class_name}")
-                        raise Exception(f"Generated code does not have required elements for section '{section['title']}'")
-                
-                # Apply standard fixes including fixing the class name if needed
-                scene_code = self._fix_manim_code(scene_code, scene_class_name)
-                scene_classes.append(scene_class_name)
-                scene_codes.append(scene_code)
+            # Generate a separate scene class for each section. The sections don't depend
+            # on each other, so their LLM calls run concurrently; map keeps the section order
+            with ThreadPoolExecutor(max_workers=max(1, min(len(sections), MAX_SECTION_WORKERS))) as executor:
+                results = list(executor.map(
+                    lambda item: self._generate_section_code(item[0], item[1], llm_handler, use_cache),
+                    enumerate(sections)
+                ))
+            scene_classes = [scene_class_name for scene_class_name, _, _ in results]
+            scene_codes = [scene_code for _, scene_code, _ in results]
             
             # Generate the combined scene that will call all sub-scenes
             full_code = self._generate_combined_scene(scene_classes, scene_codes, generation_id)
             
-            # Save the combined code to a file
+            # Catch syntax errors here rather than by starting Manim
+            full_code = self._fix_syntax_before_render(full_code, generation_id)
+            
+            # Save the combined code to a file, kept open for the rewrite on retry
             temp_file_path = os.path.join(output_dir, f"scene_{generation_id}.py")
-            with open(temp_file_path, "w") as f:
-                f.write(full_code)
+            scene_fd = self._open_scene_file(temp_file_path)
+            self._write_scene_file(scene_fd, full_code)
             
             # Print generated code for debugging
             print(f"\nGenerated combined Manim code for scene_{generation_id}.py:")
@@ -692,51 +918,29 @@ EXTREMELY IMPORTANT:
             print(full_code[:500] + "..." if len(full_code) > 500 else full_code)
             print("--------------------------------------------------\n")
             
-            # Run Manim to generate the video
-            command = [
-                "manim",
-                "-qm",  # medium quality
-                "--format=mp4",
-                "--output_file", generation_id,
-                "--media_dir", "outputs",
-                temp_file_path,
-                "CustomAnimation"  # The main combined scene class
-            ]
+            # Run Manim to generate the video from the main combined scene class
+            command = self._manim_command(temp_file_path, generation_id)
             
             # Print the command for debugging
             print(f"Running command: {' '.join(command)}")
             
             # Run Manim
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = process.communicate()
+            returncode, stderr = self._run_manim(command)
             
-            print(f"Manim stdout: {stdout}")
             if stderr:
                 print(f"Manim stderr: {stderr}")
             
-            if process.returncode != 0:
+            if returncode != 0:
                 # If the first attempt failed, try aggressive fixes and retry
                 print("First attempt failed, applying aggressive fixes...")
                 fixed_code = self._apply_aggressive_fixes(full_code, stderr)
                 
-                with open(temp_file_path, "w") as f:
-                    f.write(fixed_code)
+                self._write_scene_file(scene_fd, fixed_code)
                 
                 # Retry running Manim
-                process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                stdout, stderr = process.communicate()
+                returncode, stderr = self._run_manim(command)
                 
-                if process.returncode != 0:
+                if returncode != 0:
                     # If still failed, report the error
                     print("Second attempt failed")
                     raise Exception(f"Failed to generate video: {stderr}")
@@ -746,6 +950,10 @@ EXTREMELY IMPORTANT:
             if not video_path:
                 raise Exception("Video file not found after generation")
             
+            # The section code rendered, so it is safe to serve from the cache from now on
+            for _, _, (scene_prompt, raw_code) in results:
+                llm_handler.cache_manim_code(scene_prompt, raw_code)
+            
             # Cleanup temporary files if needed
             self.cleanup(temp_file_path)
             
@@ -754,14 +962,55 @@ EXTREMELY IMPORTANT:
         except Exception as e:
             print(f"Error in create_modular_video: {str(e)}")
             raise
+        finally:
+            if scene_fd is not None:
+                os.close(scene_fd)
+    
+    def _generate_section_code(self, index: int, section: Dict[str, str], llm_handler, use_cache: bool = True) -> tuple:
+        """
+        Generate and fix the scene code for a single narration section.
+        Returns the scene class name, its code, and the (prompt, raw code) pair to cache once it renders.
+        """
+        # Generate scene code for this section only
+        scene_class_name = f"Scene{index+1}_{self._sanitize_name(section['title'])}"
+        scene_prompt = self._generate_scene_prompt(
+            section_title=section['title'],
+            section_content=section['content'],
+            scene_class_name=scene_class_name
+        )
+        
+        # Pass a smaller, focused prompt to the LLM
+        scene_code = llm_handler.generate_manim_code(scene_prompt, use_cache=use_cache)
+        
+        # Validate the code has the required elements before fixing
+        if not self._validate_scene_code(scene_code, scene_class_name):
+            print(f"Generated code for {scene_class_name} does not have required elements")
+            print(f"Raw code: {scene_code[:200]}...")
+            # Try regenerating the code with a more explicit prompt
+            enhanced_prompt = self._generate_enhanced_scene_prompt(
+                section_title=section['title'],
+                section_content=section['content'],
+                scene_class_name=scene_class_name
+            )
+            print(f"Trying again with enhanced prompt for {scene_class_name}")
+            scene_prompt = enhanced_prompt
+            scene_code = llm_handler.generate_manim_code(scene_prompt, use_cache=use_cache)
+            
+            # Check if we now have valid code
+            if not self._validate_scene_code(scene_code, scene_class_name):
+                print(f"Second attempt failed for {scene_class_name}")
+                raise Exception(f"Generated code does not have required elements for section '{section['title']}'")
+        
+        # Apply standard fixes including fixing the class name if needed
+        fixed_code = self._fix_manim_code(scene_code, scene_class_name)
+        return scene_class_name, fixed_code, (scene_prompt, scene_code)
     
     def _parse_narration_sections(self, narration_script: str) -> List[Dict[str, str]]:
         """Parse the narration script into sections based on timestamps."""
-        # Regular expression to find timestamp sections like [00:00] TITLE
-        section_pattern = r'\[([\d:]+)\]\s+([^\n]+)(?:\n(.*?))?(?=\n\[[\d:]+\]|\Z)'
+        # Find timestamp sections like [00:00] TITLE
         sections = []
         
-        for match in re.finditer(section_pattern, narration_script, re.DOTALL):
+        for match in _SECTION_RE.finditer(narration_script):
             sections.append({
                 'timestamp': match.group(1),
                 'title': match.group(2),
@@ -773,7 +1022,7 @@ EXTREMELY IMPORTANT:
     def _sanitize_name(self, name: str) -> str:
         """Convert a section name to a valid Python class name."""
         # Remove non-alphanumeric characters and replace spaces with underscores
-        sanitized = re.sub(r'[^a-zA-Z0-9_]', '', name.replace(' ', '_'))
+        sanitized = _NON_IDENTIFIER_RE.sub('', name.replace(' ', '_'))
         # Ensure it starts with a letter
         if sanitized and not sanitized[0].isalpha():
             sanitized = 'S_' + sanitized
@@ -784,7 +1033,7 @@ EXTREMELY IMPORTANT:
         # Extract imports from all scene codes
         all_imports = set()
         for code in scene_codes:
-            import_lines = [line for line in code.split('\n') if line.startswith('import') or line.startswith('from')]
+            import_lines = [line for line in code.split('\n') if line.startswith(('import', 'from'))]
             all_imports.update(import_lines)
         
         combined_code = """
@@ -897,22 +1146,21 @@ class CustomAnimation(Scene):
         # Check required imports
         has_manim_import = "from manim import" in code
         
-        # Check for class definition - first try exact name
-        class_definition_pattern = rf"class\s+{scene_class_name}\s*\(\s*Scene\s*\)\s*:"
-        has_class_definition = bool(re.search(class_definition_pattern, code))
+        # Check for class definition - first try exact name, then any Scene class,
+        # both from one scan with the compiled pattern
+        scene_classes = list(_SCENE_CLASS_RE.finditer(code))
+        has_class_definition = any(m.group(1) == scene_class_name for m in scene_classes)
         
         # If not found, check for any Scene class
         if not has_class_definition:
-            any_scene_pattern = r"class\s+(\w+)\s*\(\s*Scene\s*\)\s*:"
-            any_class_match = re.search(any_scene_pattern, code)
+            any_class_match = scene_classes[0] if scene_classes else None
             if any_class_match:
                 # Found a scene class with the wrong name - we'll fix it later
                 has_class_definition = True
                 print(f"Found class {any_class_match.group(1)} instead of {scene_class_name} - will fix")
         
         # Check for construct method
-        construct_pattern = r"def\s+construct\s*\(\s*self\s*\)\s*:"
-        has_construct_method = bool(re.search(construct_pattern, code))
+        has_construct_method = bool(_CONSTRUCT_DEF_RE.search(code))
         
         valid = has_manim_import and has_class_definition and has_construct_method
         
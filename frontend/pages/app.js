@@ -92,7 +92,7 @@ export default function App() {
                     <p className="text-sm text-red-700 dark:text-red-300">{error}</p>
                     {error.includes('backend server') && (
                       <p className="text-sm text-red-700 dark:text-red-300 mt-2">
-                        Try running the backend manually: <code className="bg-red-100 dark:bg-red-900/40 px-1 rounded">python3 backend/main.py</code>
+                        Try running the backend manually: <code className="bg-red-100 dark:bg-red-900/40 px-1 rounded">python3 -m backend.main</code>
                       </p>
                     )}
                   </div>
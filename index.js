@@ -25,7 +25,7 @@ const pythonCommand = fs.existsSync('/usr/bin/python3') ? 'python3' : 'python';
 
 // Start backend
 console.log(`🚀 Starting backend server with ${pythonCommand}...`);
-const backendProcess = spawn(pythonCommand, ['backend/main.py'], {
+const backendProcess = spawn(pythonCommand, ['-m', 'backend.main'], {
   stdio: 'inherit',
   detached: false
 });
@@ -62,7 +62,7 @@ process.on('SIGQUIT', cleanup);
 backendProcess.on('error', (error) => {
   console.error('Backend error:', error);
   console.log('⚠️ Could not start the backend server. Make sure Python is installed and in your PATH.');
-  console.log('Try running the backend manually: python3 backend/main.py');
+  console.log('Try running the backend manually: python3 -m backend.main');
 });
 
 frontendProcess.on('error', (error) => {
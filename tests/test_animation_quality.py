@@ -10,17 +10,16 @@ import time
 import argparse
 from pathlib import Path
 
-# Add the backend directory to the path
+# Add the project root to the path so the backend package can be imported
 script_dir = Path(__file__).parent.absolute()
-backend_dir = script_dir / "backend"
-sys.path.append(str(backend_dir))
+sys.path.append(str(script_dir.parent))
 
 # Import the necessary modules
 try:
-    from llm_handler import LLMHandler
-    from groq_handler import GroqHandler
-    from scene_generator import SceneGenerator
-    from prompt_optimizer import PromptOptimizer
+    from backend.llm_handler import LLMHandler
+    from backend.groq_handler import GroqHandler
+    from backend.scene_generator import SceneGenerator
+    from backend.prompt_optimizer import PromptOptimizer
 except ImportError:
     print("Error: Could not import required modules from backend directory.")
     print("Make sure you're running this script from the project root directory.")
@@ -62,7 +61,7 @@ def generate_test_animation(model_name, prompt, optimize=True):
             print("Optimizing prompt...")
             start_time = time.time()
             prompt_optimizer = PromptOptimizer()
-            enhanced_prompt = prompt_optimizer.enhance_prompt(prompt)
+            enhanced_prompt = prompt_optimizer.enhance_prompt(prompt, use_cache=False)
             optimize_time = time.time() - start_time
             print(f"Prompt optimized in {optimize_time:.2f} seconds")
             print(f"Enhanced prompt: {enhanced_prompt[:200]}...")
@@ -86,7 +85,7 @@ def generate_test_animation(model_name, prompt, optimize=True):
     # Generate narration script
     print("Generating narration script...")
     start_time = time.time()
-    narration_script = handler.generate_narration_script(enhanced_prompt)
+    narration_script = handler.generate_narration_script(enhanced_prompt, use_cache=False)
     script_time = time.time() - start_time
     print(f"Narration script generated in {script_time:.2f} seconds")
     
@@ -99,7 +98,7 @@ def generate_test_animation(model_name, prompt, optimize=True):
     # Generate Manim code
     print("Generating Manim code...")
     start_time = time.time()
-    manim_code = handler.generate_manim_code(enhanced_prompt, narration_script)
+    manim_code = handler.generate_manim_code(enhanced_prompt, narration_script, use_cache=False)
     code_time = time.time() - start_time
     print(f"Manim code generated in {code_time:.2f} seconds")
     
@@ -159,7 +158,7 @@ def optimize_prompt_only(prompt):
         
         # Time the optimization
         start_time = time.time()
-        enhanced_prompt = prompt_optimizer.enhance_prompt(prompt)
+        enhanced_prompt = prompt_optimizer.enhance_prompt(prompt, use_cache=False)
         optimize_time = time.time() - start_time
         
         # Display results
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that validate_and_fix_code keeps the behaviour of the old line scanner.
+Expected outputs are the ones the line scanner produced; the cases where the syntax tree
+version deliberately differs say so.
+"""
+import os
+import sys
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.llm_handler import _validate_and_fix_code_impl as validate_and_fix_code
+
+def expect_error(code, message):
+    """Assert that validating the code raises an exception mentioning message"""
+    try:
+        validate_and_fix_code(code)
+        assert False, "No exception was raised"
+    except Exception as e:
+        assert message in str(e), str(e)
+
+def test_clean_code_unchanged():
+    """Code that needs no fixes is returned as-is."""
+    code = """from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        circle = Circle()
+        self.play(Create(circle))
+        self.wait(1)
+"""
+    assert validate_and_fix_code(code) == code
+    print("SUCCESS: Clean code unchanged")
+
+def test_final_wait_added():
+    """A construct method without a final wait gets one, after multi-line statements too."""
+    code = """from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        circle = Circle()
+        self.play(Create(circle))
+"""
+    assert validate_and_fix_code(code) == code.replace(
+        "Create(circle))\n", "Create(circle))\n        self.wait(2)  # Final wait\n"
+    )
+
+    code = """from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        group = VGroup(
+            Circle(),
+            Square()
+        )
+        self.play(Create(group))
+"""
+    assert validate_and_fix_code(code) == code.replace(
+        "Create(group))\n", "Create(group))\n        self.wait(2)  # Final wait\n"
+    )
+    print("SUCCESS: Final wait added")
+
+def test_prose_deprecated_calls_and_imports():
+    """Leading prose is stripped, ShowCreation is replaced and missing imports are added."""
+    code = """Here is the animation:
+from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        angle = math.pi / 4
+        dot = Dot(np.array([1, 0, 0]))
+        self.play(ShowCreation(Line(ORIGIN, RIGHT).rotate(angle)))
+        self.wait(2)
+"""
+    expected = "import numpy as np\nimport math\n" + code[len("Here is the animation:\n"):].replace(
+        "ShowCreation(", "Create("
+    )
+    assert validate_and_fix_code(code) == expected
+    print("SUCCESS: Prose, deprecated calls and imports fixed")
+
+def test_module_level_self_removed():
+    """Statements referencing self outside a method are dropped."""
+    code = """from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(square))
+        self.wait(1)
+
+self.wait(2)
+"""
+    # The line scanner never left the method once it had entered it, so it kept this
+    # statement; it is dropped now, as the fix always intended
+    assert validate_and_fix_code(code) == code.replace("self.wait(2)\n", "")
+    print("SUCCESS: Module-level self reference removed")
+
+def test_latex_rejected():
+    """Tex calls are rejected, including in code that doesn't parse."""
+    expect_error("""from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        eq = MathTex("a^2 + b^2 = c^2")
+        self.play(Write(eq))
+        self.wait(1)
+""", "LaTeX")
+
+    # Doesn't parse, so this goes through the line-by-line fallback check
+    expect_error("""from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        eq = MathTex("x"
+        self.play(Write(eq))
+""", "LaTeX")
+    print("SUCCESS: LaTeX rejected")
+
+def test_latex_in_strings_allowed():
+    """Tex( inside a string is not a call; the line scanner rejected it."""
+    code = """from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        label = Text("No Tex( here")
+        self.play(Write(label))
+        self.wait(1)
+"""
+    assert validate_and_fix_code(code) == code
+
+    # The fallback for code that doesn't parse skips strings too
+    broken = code.replace('Text("No Tex( here")', 'Text("No Tex( here"')
+    assert validate_and_fix_code(broken) == broken
+    print("SUCCESS: LaTeX in strings allowed")
+
+def test_unparsable_code_passed_through():
+    """Code that doesn't parse is left for SceneGenerator's syntax repair."""
+    code = """from manim import *
+
+class CustomAnimation(Scene):
+    def construct(self):
+        circle = Circle(
+        self.play(Create(circle))
+"""
+    # The line scanner appended a final wait here; without a syntax tree it isn't added
+    assert validate_and_fix_code(code) == code
+    print("SUCCESS: Unparsable code passed through")
+
+def test_missing_elements_rejected():
+    """Code without the Manim import, scene class or construct method is rejected."""
+    expect_error("from manim import *\n\ncircle = Circle()\n", "missing required elements")
+    expect_error("class CustomAnimation(Scene):\n    def construct(self):\n        self.wait(1)\n", "Manim import")
+    print("SUCCESS: Incomplete code rejected")
+
+if __name__ == "__main__":
+    test_clean_code_unchanged()
+    test_final_wait_added()
+    test_prose_deprecated_calls_and_imports()
+    test_module_level_self_removed()
+    test_latex_rejected()
+    test_latex_in_strings_allowed()
+    test_unparsable_code_passed_through()
+    test_missing_elements_rejected()
+    print("Tests completed.")
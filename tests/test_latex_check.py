@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the line-by-line LaTeX check used while streaming generated code.
+"""
+import os
+import sys
+import ast
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.llm_handler import _find_latex_call, _mentions_latex_call, _uses_latex
+
+def test_calls_are_found():
+    """Tex calls are found, with or without a prefix, attribute or space before the parenthesis."""
+    for line in ('eq = MathTex("a^2")', 'title = Tex("x")', 'eq = self.MathTex(1)', 'eq = Tex ("x")',
+                 'a = Text("#"); b = MathTex("x")', 'x = ""; y = MathTex(1)'):
+        assert _find_latex_call(line) == (True, None), line
+    print("SUCCESS: Tex calls detected")
+
+def test_strings_and_comments_are_skipped():
+    """Tex( inside string literals or comments is not a call."""
+    for line in ('label = Text("use Tex( here")', "label = Text('MathTex(')  # MathTex(",
+                 'label = Text("esc \\" Tex(")', 'label = f"{1}" + "Tex("', '# MathTex("a")',
+                 'shape = Texture(1)'):
+        assert _find_latex_call(line) == (False, None), line
+    print("SUCCESS: Strings and comments skipped")
+
+def test_triple_quotes_span_lines():
+    """An open triple-quoted string is carried over to the following lines."""
+    assert _find_latex_call('doc = """Explains') == (False, '"""')
+    assert _find_latex_call('MathTex( in a docstring', '"""') == (False, '"""')
+    assert _find_latex_call('end""" + str(MathTex(1))', '"""') == (True, None)
+    assert _find_latex_call("notes = '''a'''; t = Tex('b')") == (True, None)
+    assert _find_latex_call("done ''' x = 1", "'''") == (False, None)
+    print("SUCCESS: Triple-quote state carried across lines")
+
+def test_definitions_are_skipped():
+    """Defining a class or function whose name ends in Tex is not a call."""
+    for line in ('class MyTex(VGroup):', 'def fooTex(self):', 'async def fooTex(a):'):
+        assert _find_latex_call(line) == (False, None), line
+    assert _find_latex_call('def f(): return MathTex(1)') == (True, None)
+    print("SUCCESS: Definitions skipped")
+
+def test_agrees_with_ast_check():
+    """The line check flags exactly the code the AST check flags."""
+    samples = [
+        'x = Text("use Tex( here")',
+        'x = MathTex("a")',
+        's = """\nMathTex(\n"""\nw = Text("a")',
+        'class MyTex(VGroup):\n    pass',
+        'class MyTex(VGroup):\n    x = MyTex()',
+        'def fooTex(a):\n    return a',
+        'def f():\n    return Tex("a")  # Tex(',
+    ]
+    for code in samples:
+        assert _mentions_latex_call(code) == _uses_latex(ast.parse(code)), code
+    print("SUCCESS: Line check agrees with the AST check")
+
+if __name__ == "__main__":
+    test_calls_are_found()
+    test_strings_and_comments_are_skipped()
+    test_triple_quotes_span_lines()
+    test_definitions_are_skipped()
+    test_agrees_with_ast_check()
+    print("Tests completed.")
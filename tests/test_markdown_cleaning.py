@@ -101,7 +101,7 @@ class CustomAnimation(Scene):
     print("\nAfter:")
     print(fixed_code_4)
     
-    # Test last resort fixes
+    # Test that code the fixes can't repair is rejected instead of rendered
     problem_code = """```python
 from manim import *
 
@@ -116,12 +116,19 @@ class CustomAnimation(Scene):
         # Missing parenthesis here too
 ```"""
     
-    fixed_code = scene_gen._apply_last_resort_fixes(problem_code)
-    print("\nTest Case 5: Last resort fixes for broken code")
+    print("\nTest Case 5: Unrepairable code is rejected")
     print("Before:")
     print(problem_code)
-    print("\nAfter:")
-    print(fixed_code)
+    debug_file = "debug_scene_markdown_test.py"
+    try:
+        scene_gen._fix_syntax_before_render(problem_code, "markdown_test")
+        assert False, "No exception was raised"
+    except Exception as e:
+        assert "syntax errors" in str(e)
+        print(f"\nRejected: {e}")
+    finally:
+        assert os.path.exists(debug_file)
+        os.remove(debug_file)
     
 if __name__ == "__main__":
     test_markdown_cleaning() 
\ No newline at end of file
@@ -14,11 +14,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.llm_handler import LLMHandler
 from backend.groq_handler import GroqHandler
+from backend.response_cache import ResponseCache
 
 def test_narration_script_error_handling():
     """Test narration script generation error handling."""
     try:
-        handler = LLMHandler()
+        handler = LLMHandler(cache=ResponseCache(":memory:"))
         # Deliberately remove API key to cause an error
         handler.api_key = None
         
@@ -31,7 +32,7 @@ def test_narration_script_error_handling():
 def test_manim_code_error_handling():
     """Test Manim code generation error handling."""
     try:
-        handler = LLMHandler()
+        handler = LLMHandler(cache=ResponseCache(":memory:"))
         # Simulate an error in the response
         code = handler.validate_and_fix_code("This is not valid Manim code")
         print("ERROR: No exception was raised for invalid code")
@@ -41,7 +42,7 @@ def test_manim_code_error_handling():
 def test_groq_error_handling():
     """Test Groq handler error handling."""
     try:
-        handler = GroqHandler()
+        handler = GroqHandler(cache=ResponseCache(":memory:"))
         # Deliberately remove API key to cause an error
         handler.api_key = None
         
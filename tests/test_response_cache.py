@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the two-tier LLM response cache.
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.response_cache import ResponseCache
+
+def make_cache(**kwargs):
+    """Create a cache backed by a fresh SQLite file"""
+    path = os.path.join(tempfile.mkdtemp(), "responses.sqlite3")
+    return ResponseCache(path, **kwargs), path
+
+def test_round_trip_and_persistence():
+    """Values are served from memory and survive a new cache on the same file."""
+    cache, path = make_cache()
+    key = ResponseCache.make_key("model", "code", "prompt")
+    assert cache.get(key) is None
+
+    cache.set(key, "code")
+    assert cache.get(key) == "code"
+
+    # A new instance starts with an empty L1, so this is answered by SQLite
+    reopened = ResponseCache(path)
+    assert reopened.get(key) == "code"
+    print("SUCCESS: Cached value persisted across instances")
+
+def test_make_key_separates_parts():
+    """Keys don't collide when the same text is split differently."""
+    assert ResponseCache.make_key("ab", "c") != ResponseCache.make_key("a", "bc")
+    assert ResponseCache.make_key("a", "b") == ResponseCache.make_key("a", "b")
+
+def test_l1_eviction_and_promotion():
+    """The least recently used entry leaves L1 but is promoted back from L2."""
+    cache, _ = make_cache(memory_size=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert list(cache._l1) == ["a", "c"]
+    assert cache.get("b") == "2"
+    assert "b" in cache._l1
+    assert len(cache._l1) == 2
+    print("SUCCESS: Evicted entry promoted back from SQLite")
+
+def test_ttl_expiry():
+    """Rows older than the TTL are not served from L2."""
+    cache, path = make_cache(ttl=60)
+    cache.set("old", "stale")
+    cache._db.execute("UPDATE cache SET ts = ? WHERE key = ?", (time.time() - 120, "old"))
+
+    assert ResponseCache(path, ttl=60).get("old") is None
+    print("SUCCESS: Expired entry ignored")
+
+def test_prune_keeps_newest_entries():
+    """Pruning drops expired rows and keeps only the newest max_entries."""
+    cache, _ = make_cache(max_entries=3, memory_size=1)
+    for i in range(5):
+        cache.set(f"k{i}", str(i))
+        cache._db.execute("UPDATE cache SET ts = ? WHERE key = ?", (1000.0 + i, f"k{i}"))
+    cache.ttl = time.time() - 100
+    cache.set("expired", "x")
+    cache._db.execute("UPDATE cache SET ts = ? WHERE key = ?", (1.0, "expired"))
+
+    cache._prune()
+    keys = {row[0] for row in cache._db.execute("SELECT key FROM cache")}
+    assert keys == {"k2", "k3", "k4"}
+    print("SUCCESS: Prune kept the newest entries")
+
+def test_delete_removes_both_tiers():
+    """Deleted keys are gone from memory and from SQLite."""
+    cache, path = make_cache()
+    cache.set("key", "broken code")
+    cache.delete("key")
+
+    assert cache.get("key") is None
+    assert ResponseCache(path).get("key") is None
+    print("SUCCESS: Deleted entry not served again")
+
+def test_memory_only_fallback():
+    """An in-memory database still caches values."""
+    cache = ResponseCache(":memory:")
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+def test_get_or_compute_shares_one_call():
+    """Concurrent misses for the same key compute once; errors reach the caller."""
+    cache, _ = make_cache()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+
+    def fail():
+        raise ValueError("boom")
+
+    try:
+        cache.get_or_compute("other", fail)
+        assert False, "No exception was raised"
+    except ValueError:
+        pass
+    assert cache.get("other") is None
+    print("SUCCESS: Concurrent misses shared one computation")
+
+if __name__ == "__main__":
+    test_round_trip_and_persistence()
+    test_make_key_separates_parts()
+    test_l1_eviction_and_promotion()
+    test_ttl_expiry()
+    test_prune_keeps_newest_entries()
+    test_delete_removes_both_tiers()
+    test_memory_only_fallback()
+    test_get_or_compute_shares_one_call()
+    print("Tests completed.")